@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.schemas.user import UserCreate, UserLogin, ShowUser
 from app.models.user import User
-from app.utils.security import ACCESS_TOKEN_EXPIRE_MINUTES, hash_password, verify_password, create_access_token
+from app.utils.security import ACCESS_TOKEN_EXPIRE_MINUTES, hash_password, verify_and_update_password, create_access_token
 from app.core.deps import get_db
+from app.core.rutas import RutaDB
 from datetime import timedelta
 
-router = APIRouter(prefix="/auth", tags=["Autenticación"])
+router = APIRouter(prefix="/auth", tags=["Autenticación"], route_class=RutaDB)
 
 @router.post("/register", response_model=ShowUser)
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
@@ -29,11 +30,23 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login")
 def login(data: UserLogin, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == data.email).first()
-    if not user or not verify_password(data.password, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
+    valida, hash_nuevo = verify_and_update_password(data.password, user.hashed_password)
+    if not valida:
+        raise HTTPException(status_code=401, detail="Credenciales inválidas")
+    if hash_nuevo:
+        # Cambió BCRYPT_ROUNDS: se guarda el hash con el costo actual
+        user.hashed_password = hash_nuevo
+        db.commit()
 
     access_token = create_access_token(
-        data={"sub": str(user.id), "rol": user.rol},
+        data={
+            "sub": str(user.id),
+            "rol": getattr(user.rol, "value", user.rol),
+            "negocio_id": user.negocio_id,
+            "ver": user.token_version or 0
+        },
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
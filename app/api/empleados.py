@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
 from app.db.session import get_db
 from app.models import turno as TurnoModel, agenda as AgendaModel, servicio as ServicioModel, user as UserModel
 from app.schemas.turno import ShowTurno, TurnoUpdate
 from app.schemas.servicio import ServicioCreate, ServicioOut, ServicioUpdate, ServicioCreateAdmin
-from app.schemas.empleado import EmpleadoCreate, EmpleadoOut, AgendaCreateEmpleado, ServicioEmpleado, ServicioUpdateEmpleado, EmpleadoUpdate
+from app.schemas.empleado import EmpleadoCreate, EmpleadoOut, AgendaCreateEmpleado, AgendaRecurrenteEmpleado, ServicioEmpleado, ServicioUpdateEmpleado, EmpleadoUpdate
 from app.schemas.agenda import ShowAgenda
 from app.utils.security import hash_password
 from app.core.roles import verify_role
+from app.core.deps import revocar_tokens, olvidar_usuario
+from app.utils.disponibilidad import invalidar_disponibilidad
+from app.utils.slots import agendas_creadas, turno_cambiado
+from app.utils.turnos import escritura_turnos, horario_nuevo, validar_horario_turno
+from app.utils.paginacion import LIMITE_POR_DEFECTO, LIMITE_MAXIMO, paginar_turnos, filtrar_turnos
+from app.core.rutas import RutaDB
+from app.utils.referencias import invalidar_empleado, invalidar_servicio, obtener_empleado as obtener_empleado_ref
+from app.utils.eventos import LIBERADO, OCUPADO, publicar_horario
+from app.utils.versiones import cambio_catalogo
+from app.core.serializacion import RespuestaJSON, columnas, respuesta_filas
 
-router = APIRouter(prefix="/empleados", tags=["Empleados"])
+router = APIRouter(prefix="/empleados", tags=["Empleados"], route_class=RutaDB)
 
 # --- FUNCIONALIDADES EMPLEADO ---
 @router.get("/agenda", response_model=list[ShowAgenda])
@@ -24,29 +35,97 @@ def listar_mi_agenda(db: Session = Depends(get_db),
         AgendaModel.Agenda.dia <= max_dia
     ).all()
 
+def validar_rango_agenda(hora_inicio, hora_fin, duracion_turno: int):
+    # Al menos un turno entero tiene que entrar en el rango
+    if hora_inicio >= hora_fin:
+        raise HTTPException(status_code=400, detail="La hora de inicio debe ser anterior a la de fin")
+    minutos = (hora_fin.hour * 60 + hora_fin.minute) - (hora_inicio.hour * 60 + hora_inicio.minute)
+    if duracion_turno > minutos:
+        raise HTTPException(status_code=400, detail="La duración del turno no entra en el rango horario")
+
 @router.post("/agenda", response_model=ShowAgenda)
 def crear_mi_agenda(data: AgendaCreateEmpleado,
                     db: Session = Depends(get_db),
                     current_user: UserModel.User = Depends(verify_role("empleado"))):
-    agendas_existentes = db.query(AgendaModel.Agenda).filter(
+    validar_rango_agenda(data.hora_inicio, data.hora_fin, data.duracion_turno)
+    solapada = db.query(AgendaModel.Agenda.id).filter(
         AgendaModel.Agenda.empleado_id == current_user.id,
-        AgendaModel.Agenda.dia == data.dia
-    ).all()
-
-    for agenda in agendas_existentes:
-        if (data.hora_inicio < agenda.hora_fin and data.hora_fin > agenda.hora_inicio):
-            raise HTTPException(status_code=400, detail="Existe una agenda solapada en el mismo día")
+        AgendaModel.Agenda.dia == data.dia,
+        AgendaModel.Agenda.hora_inicio < data.hora_fin,
+        AgendaModel.Agenda.hora_fin > data.hora_inicio
+    ).first()
+    if solapada:
+        raise HTTPException(status_code=400, detail="Existe una agenda solapada en el mismo día")
 
     nueva = AgendaModel.Agenda(**data.dict(), empleado_id=current_user.id)
     db.add(nueva)
+    agendas_creadas(db, current_user.id, [nueva])
     db.commit()
     db.refresh(nueva)
+    invalidar_disponibilidad(current_user.id, nueva.dia)
+    publicar_horario(db, LIBERADO, current_user.id, nueva.dia, nueva.hora_inicio, nueva.hora_fin)
     return nueva
 
-@router.get("/mis-turnos", response_model=list[ShowTurno])
-def listar_mis_turnos(db: Session = Depends(get_db),
+@router.post("/agenda/recurrente")
+def crear_mi_agenda_recurrente(data: AgendaRecurrenteEmpleado,
+                                db: Session = Depends(get_db),
+                                current_user: UserModel.User = Depends(verify_role("empleado"))):
+    validar_rango_agenda(data.hora_inicio, data.hora_fin, data.duracion_turno)
+    if any(d < 0 or d > 6 for d in data.dias_semana):
+        raise HTTPException(status_code=400, detail="Los días de la semana van de 0 (lunes) a 6 (domingo)")
+
+    # Expandir la regla en días concretos
+    excepciones = set(data.excepciones)
+    dias = [
+        dia for dia in (data.desde + timedelta(days=i) for i in range(data.semanas * 7))
+        if dia.weekday() in data.dias_semana and dia not in excepciones
+    ]
+    if not dias:
+        raise HTTPException(status_code=400, detail="La regla no genera ningún día")
+
+    # Solapamientos de todo el lote en una sola consulta
+    solapadas = db.query(AgendaModel.Agenda.dia).filter(
+        AgendaModel.Agenda.empleado_id == current_user.id,
+        AgendaModel.Agenda.dia.in_(dias),
+        AgendaModel.Agenda.hora_inicio < data.hora_fin,
+        AgendaModel.Agenda.hora_fin > data.hora_inicio
+    ).distinct().all()
+    if solapadas:
+        fechas = ", ".join(sorted(dia.isoformat() for dia, in solapadas))
+        raise HTTPException(status_code=400, detail=f"Existen agendas solapadas en: {fechas}")
+
+    filas = [
+        {
+            "empleado_id": current_user.id,
+            "dia": dia,
+            "hora_inicio": data.hora_inicio,
+            "hora_fin": data.hora_fin,
+            "duracion_turno": data.duracion_turno
+        }
+        for dia in dias
+    ]
+    db.execute(insert(AgendaModel.Agenda), filas)
+    agendas_creadas(db, current_user.id, filas)
+    db.commit()
+    invalidar_disponibilidad(current_user.id, *dias)
+    for dia in dias:
+        publicar_horario(db, LIBERADO, current_user.id, dia, data.hora_inicio, data.hora_fin)
+    return {"creadas": len(dias), "dias": [dia.isoformat() for dia in dias]}
+
+@router.get("/mis-turnos", response_class=RespuestaJSON, responses={200: {"model": list[ShowTurno]}})
+def listar_mis_turnos(response: Response,
+                        limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                        cursor: str | None = None,
+                        desde: date | None = None,
+                        hasta: date | None = None,
+                        estado: str | None = None,
+                        db: Session = Depends(get_db),
                         current_user: UserModel.User = Depends(verify_role("empleado"))):
-    return db.query(TurnoModel.Turno).filter(TurnoModel.Turno.empleado_id == current_user.id).all()
+    query = db.query(*columnas(TurnoModel.Turno, ShowTurno.model_fields)).filter(
+        TurnoModel.Turno.empleado_id == current_user.id
+    )
+    query = filtrar_turnos(query, desde, hasta, estado)
+    return respuesta_filas(paginar_turnos(query, limit, cursor, response), response)
 
 @router.put("/turnos/{turno_id}", response_model=ShowTurno)
 def actualizar_turno_empleado(turno_id: int, update: TurnoUpdate,
@@ -58,10 +137,22 @@ def actualizar_turno_empleado(turno_id: int, update: TurnoUpdate,
     ).first()
     if not turno:
         raise HTTPException(status_code=404, detail="Turno no encontrado")
-    for field, value in update.dict(exclude_unset=True).items():
-        setattr(turno, field, value)
-    db.commit()
+    dia_anterior = turno.dia
+    horario_anterior = (turno.dia, turno.hora_inicio, turno.hora_fin)
+    cambios = update.dict(exclude_unset=True)
+    horario = horario_nuevo(turno, cambios)
+    with escritura_turnos(db, {(turno.empleado_id, dia_anterior), (turno.empleado_id, horario[0])}):
+        if horario != horario_anterior:
+            validar_horario_turno(db, turno.empleado_id, *horario, excluir_id=turno.id)
+        for field, value in cambios.items():
+            setattr(turno, field, value)
+        turno_cambiado(db, turno.empleado_id, dia_anterior, turno.dia)
+        db.commit()
     db.refresh(turno)
+    invalidar_disponibilidad(turno.empleado_id, dia_anterior, turno.dia)
+    if (turno.dia, turno.hora_inicio, turno.hora_fin) != horario_anterior:
+        publicar_horario(db, LIBERADO, turno.empleado_id, *horario_anterior)
+        publicar_horario(db, OCUPADO, turno.empleado_id, turno.dia, turno.hora_inicio, turno.hora_fin)
     return turno
 
 @router.post("/servicios")
@@ -75,6 +166,7 @@ def crear_mi_servicio(data: ServicioEmpleado,
     )
     db.add(nuevo)
     db.commit()
+    cambio_catalogo()
     db.refresh(nuevo)
     return nuevo
 
@@ -91,6 +183,7 @@ def editar_mi_servicio(servicio_id: int, data: ServicioUpdateEmpleado,
     for field, value in data.dict(exclude_unset=True).items():
         setattr(servicio, field, value)
     db.commit()
+    invalidar_servicio(servicio_id)
     db.refresh(servicio)
     return servicio
 
@@ -106,6 +199,7 @@ def eliminar_mi_servicio(servicio_id: int,
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
     db.delete(servicio)
     db.commit()
+    invalidar_servicio(servicio_id)
     return {"detail": "Servicio eliminado con éxito"}
 
 @router.post("/empleado/servicio", response_model=ServicioOut)
@@ -124,6 +218,7 @@ def crear_servicio_empleado(
     )
     db.add(nuevo_servicio)
     db.commit()
+    cambio_catalogo()
     db.refresh(nuevo_servicio)
     return nuevo_servicio
 
@@ -148,6 +243,7 @@ def editar_servicio_empleado(
         servicio.duracion = data.duracion
 
     db.commit()
+    invalidar_servicio(servicio_id)
     db.refresh(servicio)
     return servicio
 
@@ -163,6 +259,7 @@ def eliminar_servicio_empleado(
 
     db.delete(servicio)
     db.commit()
+    invalidar_servicio(servicio_id)
     return {"message": "Servicio eliminado correctamente"}
 
 
@@ -191,6 +288,7 @@ def crear_empleado(data: EmpleadoCreate,
     )
     db.add(nuevo)
     db.commit()
+    cambio_catalogo()
     db.refresh(nuevo)
     return nuevo
 
@@ -221,9 +319,12 @@ def editar_empleado(empleado_id: int, data: EmpleadoUpdate,
     for field, value in data.dict(exclude_unset=True).items():
         if field == "password":
             setattr(empleado, "hashed_password", hash_password(value))
+            revocar_tokens(empleado)
         else:
             setattr(empleado, field, value)
     db.commit()
+    invalidar_empleado(empleado_id)
+    olvidar_usuario(empleado.id)
     db.refresh(empleado)
     return empleado
 
@@ -240,6 +341,8 @@ def eliminar_empleado(empleado_id: int,
         raise HTTPException(status_code=404, detail="Empleado no encontrado")
     db.delete(empleado)
     db.commit()
+    invalidar_empleado(empleado_id)
+    olvidar_usuario(empleado_id)
     return {"mensaje": "Empleado eliminado"}
 
 @router.post("/admin/{empleado_id:int}/servicios", response_model=ServicioOut)
@@ -249,12 +352,8 @@ def crear_servicio_para_empleado(
     db: Session = Depends(get_db),
     current_user: UserModel.User = Depends(verify_role("admin"))
 ):
-    empleado = db.query(UserModel.User).filter(
-        UserModel.User.id == empleado_id,
-        UserModel.User.rol == UserModel.UserRole.empleado,
-        UserModel.User.negocio_id == current_user.negocio_id
-    ).first()
-    if not empleado:
+    empleado = obtener_empleado_ref(db, empleado_id)
+    if not empleado or empleado.rol != UserModel.UserRole.empleado or empleado.negocio_id != current_user.negocio_id:
         raise HTTPException(status_code=404, detail="Empleado no encontrado")
     nuevo_servicio = ServicioModel.Servicio(
         nombre=data.nombre,
@@ -267,6 +366,7 @@ def crear_servicio_para_empleado(
     )
     db.add(nuevo_servicio)
     db.commit()
+    cambio_catalogo()
     db.refresh(nuevo_servicio)
     return nuevo_servicio
 
@@ -283,6 +383,7 @@ def editar_servicio(servicio_id: int, data: ServicioUpdate,
     for field, value in data.dict(exclude_unset=True).items():
         setattr(servicio, field, value)
     db.commit()
+    invalidar_servicio(servicio_id)
     db.refresh(servicio)
     return servicio
 
@@ -298,4 +399,5 @@ def eliminar_servicio(servicio_id: int,
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
     db.delete(servicio)
     db.commit()
+    invalidar_servicio(servicio_id)
     return {"mensaje": "Servicio eliminado correctamente"}
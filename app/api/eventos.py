@@ -0,0 +1,82 @@
+#SUSCRIPCIÓN A CAMBIOS DE DISPONIBILIDAD
+# SSE:       GET /eventos?empleado_id=3&negocio_id=1   (EventSource en el navegador)
+# WebSocket: /eventos/ws?empleado_id=3&negocio_id=1
+# Cada mensaje es un JSON con tipo (ocupado, liberado o resincronizar), empleado_id,
+# negocio_id, dia, hora_inicio y hora_fin. Ver app/utils/eventos.py.
+
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.utils.eventos import bus_eventos, claves_suscripcion
+
+router = APIRouter(prefix="/eventos", tags=["Eventos"])
+
+# Un comentario cada tanto mantiene viva la conexión a través de proxies
+INTERVALO_PING = 15
+
+
+def _suscribir(empleado_id: list[int], negocio_id: list[int]):
+    claves = claves_suscripcion(empleado_id, negocio_id)
+    if not claves:
+        raise HTTPException(status_code=400, detail="Indicá al menos un empleado_id o negocio_id")
+    suscripcion = bus_eventos.suscribir(claves)
+    if suscripcion is None:
+        raise HTTPException(status_code=503, detail="Demasiados suscriptores, reintentá más tarde")
+    return suscripcion
+
+
+@router.get("")
+async def eventos_sse(request: Request,
+                      empleado_id: list[int] = Query([]),
+                      negocio_id: list[int] = Query([])):
+    suscripcion = _suscribir(empleado_id, negocio_id)
+
+    async def flujo():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    mensaje = await asyncio.wait_for(suscripcion.cola.get(), INTERVALO_PING)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {mensaje}\n\n"
+        finally:
+            bus_eventos.desuscribir(suscripcion)
+
+    return StreamingResponse(flujo(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def _esperar_cierre(websocket: WebSocket):
+    # Lo que mande el cliente (pings, keep-alive de la app) se ignora: solo importa el cierre
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/ws")
+async def eventos_ws(websocket: WebSocket,
+                     empleado_id: list[int] = Query([]),
+                     negocio_id: list[int] = Query([])):
+    try:
+        suscripcion = _suscribir(empleado_id, negocio_id)
+    except HTTPException as error:
+        await websocket.close(code=1008 if error.status_code == 400 else 1013, reason=error.detail)
+        return
+    await websocket.accept()
+    cierre = asyncio.create_task(_esperar_cierre(websocket))
+    try:
+        while True:
+            siguiente = asyncio.create_task(suscripcion.cola.get())
+            listos, _ = await asyncio.wait({siguiente, cierre}, return_when=asyncio.FIRST_COMPLETED)
+            if cierre in listos:
+                siguiente.cancel()
+                break
+            await websocket.send_text(siguiente.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        cierre.cancel()
+        bus_eventos.desuscribir(suscripcion)
@@ -1,146 +1,280 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.schemas.turno import TurnoCreate, ShowTurno
+from app.schemas.turno import TurnoCreate, ShowTurno, ReservaBatch
 from app.db.session import get_db
-from app.models import turno as TurnoModel, cliente as ClienteModel, servicio as ServicioModel
+from app.db.locks import bloqueo_empleado_dia, bloqueo_empleados_dias
+from app.models import turno as TurnoModel, servicio as ServicioModel
+from app.models.user import User, UserRole
 from app.models.agenda import Agenda  # importás directamente el modelo
 from datetime import datetime, timedelta
+from app.utils.disponibilidad import (DIAS_POR_DEFECTO, disponibilidad_empleado, disponibilidad_empleados,
+                                      formatear_dias, fusionar_empleados, invalidar_disponibilidad, a_minutos)
+from app.core.rutas import RutaDB, en_threadpool
+from app.utils.intervalos import IndiceIntervalos
+from app.utils.slots import SLOTS_MATERIALIZADOS, disponibilidad_desde_slots, turno_creado
+from app.core.metricas import contar_reserva
+from app.utils.clientes import obtener_o_crear_cliente
+from app.utils.referencias import obtener_negocio_por_alias, obtener_servicio
+from app.utils.eventos import OCUPADO, publicar_horario
+from app.utils.versiones import recordar_empleados, validador_empleado, validador_negocio
+from app.core.condicional import no_modificado
 
-router_publico = APIRouter()
+router_publico = APIRouter(route_class=RutaDB)
+
+def rechazar_reserva(endpoint: str, resultado: str, detail: str, status_code: int = 400):
+    # Cuenta el rechazo en /metrics antes de devolver el error
+    contar_reserva(endpoint, resultado)
+    raise HTTPException(status_code=status_code, detail=detail)
+
+def leer_duraciones(db: Session, servicio_ids) -> dict[int, int]:
+    """Duración actual de cada servicio que existe. En PostgreSQL toma además un lock
+    compartido de la fila hasta el commit, para que no lo borren a mitad de la reserva."""
+    return dict(db.query(ServicioModel.Servicio.id, ServicioModel.Servicio.duracion).filter(
+        ServicioModel.Servicio.id.in_(servicio_ids)
+    ).with_for_update(read=True).all())
 
 @router_publico.post("/reserva", response_model=ShowTurno)
 def reservar_turno(data: TurnoCreate, db: Session = Depends(get_db)):
-    # Verificar si el empleado tiene agenda para esa fecha
-    fecha_turno = data.fecha
-    agenda = db.query(Agenda).filter(
-        Agenda.empleado_id == data.empleado_id,
-        Agenda.dia == fecha_turno.date().isoformat()
-    ).first()
-
-    if not agenda:
-        raise HTTPException(status_code=400, detail="El empleado no tiene agenda ese día.")
-
-    # Obtener la duración del servicio
-    servicio = db.query(ServicioModel.Servicio).filter(
-        ServicioModel.id == data.servicio_id
-    ).first()
-
-    if not servicio:
-        raise HTTPException(status_code=404, detail="Servicio no encontrado")
-
-    # Calcular hora de fin del nuevo turno
-    hora_inicio_turno = fecha_turno
-    hora_fin_turno = hora_inicio_turno + timedelta(minutes=servicio.duracion_turno)
-
-    # Verificar que el turno esté dentro del horario de agenda
-    hora_inicio_agenda = datetime.combine(agenda.dia, agenda.hora_inicio)
-    hora_fin_agenda = datetime.combine(agenda.dia, agenda.hora_fin)
-
-    if not (hora_inicio_agenda <= hora_inicio_turno and hora_fin_turno <= hora_fin_agenda):
-        raise HTTPException(status_code=400, detail="El turno está fuera del rango horario disponible")
-
-    # Verificar solapamiento con otros turnos
-    turnos_existentes = db.query(TurnoModel.Turno).filter(
-        TurnoModel.empleado_id == data.empleado_id,
-        TurnoModel.fecha.between(hora_inicio_agenda, hora_fin_agenda)
-    ).all()
-
-    for turno in turnos_existentes:
-        turno_inicio = turno.fecha
-        turno_fin = turno_inicio + timedelta(minutes=servicio.duracion_turno)
-
-        if (hora_inicio_turno < turno_fin and hora_fin_turno > turno_inicio):
-            raise HTTPException(status_code=400, detail="Este horario ya está ocupado")
-
-    # Crear cliente si no existe
-    cliente = None
-    if data.cliente_email:
-        cliente = db.query(ClienteModel.Cliente).filter_by(email=data.cliente_email).first()
-    if not cliente and data.cliente_telefono:
-        cliente = db.query(ClienteModel.Cliente).filter_by(telefono=data.cliente_telefono).first()
-    if not cliente:
-        cliente = ClienteModel.Cliente(
-            nombre=data.cliente_nombre,
-            email=data.cliente_email,
-            telefono=data.cliente_telefono
+    # Todo lo que sigue es una sola transacción, serializada por (empleado, día):
+    # dos reservas concurrentes del mismo horario no pueden pasar ambas la validación.
+    with bloqueo_empleado_dia(db, data.empleado_id, data.dia):
+        # La duración se lee dentro de la transacción y no de la cache de referencias
+        # (hasta REFERENCIAS_CACHE_TTL de atraso en otros workers): un servicio editado o
+        # borrado no puede dar turnos de otra duración ni quedar reservable.
+        duracion = leer_duraciones(db, [data.servicio_id]).get(data.servicio_id)
+        if duracion is None:
+            rechazar_reserva("reserva", "servicio_inexistente", "Servicio no encontrado", 404)
+
+        # Calcular hora de fin del nuevo turno
+        inicio_turno = datetime.combine(data.dia, data.hora_inicio)
+        fin_turno = inicio_turno + timedelta(minutes=duracion)
+        if fin_turno.date() != data.dia:
+            rechazar_reserva("reserva", "fuera_de_rango", "El turno está fuera del rango horario disponible")
+        hora_fin = fin_turno.time()
+
+        # Verificar que el turno esté dentro de alguna agenda del empleado ese día
+        hay_agenda = db.query(Agenda.id).filter(
+            Agenda.empleado_id == data.empleado_id,
+            Agenda.dia == data.dia
+        ).first()
+        if not hay_agenda:
+            rechazar_reserva("reserva", "fuera_de_rango", "El empleado no tiene agenda ese día.")
+
+        dentro_de_agenda = db.query(Agenda.id).filter(
+            Agenda.empleado_id == data.empleado_id,
+            Agenda.dia == data.dia,
+            Agenda.hora_inicio <= data.hora_inicio,
+            Agenda.hora_fin >= hora_fin
+        ).first()
+        if not dentro_de_agenda:
+            rechazar_reserva("reserva", "fuera_de_rango", "El turno está fuera del rango horario disponible")
+
+        # Verificar solapamiento con otros turnos
+        solapado = db.query(TurnoModel.Turno.id).filter(
+            TurnoModel.Turno.empleado_id == data.empleado_id,
+            TurnoModel.Turno.dia == data.dia,
+            TurnoModel.Turno.hora_inicio < hora_fin,
+            TurnoModel.Turno.hora_fin > data.hora_inicio
+        ).first()
+        if solapado:
+            rechazar_reserva("reserva", "conflicto", "Este horario ya está ocupado")
+
+        cliente_id = obtener_o_crear_cliente(db, data.cliente_nombre, data.cliente_email, data.cliente_telefono)
+
+        # Crear turno
+        nuevo_turno = TurnoModel.Turno(
+            dia=data.dia,
+            hora_inicio=data.hora_inicio,
+            hora_fin=hora_fin,
+            cliente_nombre=data.cliente_nombre,
+            cliente_email=data.cliente_email,
+            cliente_telefono=data.cliente_telefono,
+            metodo_pago=data.metodo_pago,
+            monto_pagado=data.monto_pagado,
+            estado=data.estado,
+            servicio_id=data.servicio_id,
+            empleado_id=data.empleado_id,
+            cliente_id=cliente_id
         )
-        db.add(cliente)
-        db.commit()
-        db.refresh(cliente)
-
-    # Crear turno
-    nuevo_turno = TurnoModel.Turno(
-        fecha=data.fecha,
-        cliente_nombre=data.cliente_nombre,
-        cliente_email=data.cliente_email,
-        cliente_telefono=data.cliente_telefono,
-        metodo_pago=data.metodo_pago,
-        monto_pagado=data.monto_pagado,
-        estado=data.estado,
-        servicio_id=data.servicio_id,
-        empleado_id=data.empleado_id,
-        cliente_id=cliente.id
-    )
-    db.add(nuevo_turno)
-    db.commit()
+        db.add(nuevo_turno)
+        turno_creado(db, nuevo_turno)
+        try:
+            db.commit()
+        except IntegrityError:
+            # La restricción de no solapamiento de la DB (ver db/migraciones.py)
+            db.rollback()
+            rechazar_reserva("reserva", "conflicto", "Este horario ya está ocupado")
+
     db.refresh(nuevo_turno)
+    invalidar_disponibilidad(nuevo_turno.empleado_id, nuevo_turno.dia)
+    publicar_horario(db, OCUPADO, nuevo_turno.empleado_id, nuevo_turno.dia, nuevo_turno.hora_inicio, nuevo_turno.hora_fin)
+    contar_reserva("reserva", "exito")
     return nuevo_turno
 
-#DISPONIBILIDAD
-from app.models.agenda import Agenda
-from app.models.turno import Turno
-from datetime import datetime, timedelta, time
+@router_publico.post("/reservas/batch", response_model=list[ShowTurno])
+def reservar_turnos_batch(data: ReservaBatch, db: Session = Depends(get_db)):
+    # Una sola transacción, serializada por todos los (empleado, día) del lote
+    with bloqueo_empleados_dias(db, {(item.empleado_id, item.dia) for item in data.turnos}):
+        # Duraciones de todos los servicios, leídas dentro de la transacción (ver reservar_turno)
+        servicio_ids = {item.servicio_id for item in data.turnos}
+        duraciones = leer_duraciones(db, servicio_ids)
+        faltantes = servicio_ids - duraciones.keys()
+        if faltantes:
+            rechazar_reserva("batch", "servicio_inexistente", f"Servicio no encontrado: {sorted(faltantes)}", 404)
 
-@router_publico.get("/disponibilidad/{empleado_id}")
-def obtener_disponibilidad(empleado_id: int, db: Session = Depends(get_db)):
-    hoy = datetime.now().date()
-    dias_disponibles = []
+        # Intervalo (en minutos) de cada turno pedido; no pueden solaparse entre sí
+        pedidos = []
+        pedidos_por_dia = {}
+        for n, item in enumerate(data.turnos, start=1):
+            inicio = a_minutos(item.hora_inicio)
+            fin = inicio + duraciones[item.servicio_id]
+            if fin > 24 * 60:
+                rechazar_reserva("batch", "fuera_de_rango", f"Turno {n}: fuera del rango horario disponible")
+            clave = (item.empleado_id, item.dia)
+            ocupados_lote = pedidos_por_dia.setdefault(clave, IndiceIntervalos())
+            if ocupados_lote.solapa(inicio, fin):
+                rechazar_reserva("batch", "conflicto", f"Turno {n}: se solapa con otro turno de la reserva")
+            ocupados_lote.agregar(inicio, fin)
+            pedidos.append((n, item, inicio, fin))
 
-    for i in range(14):  # próximos 14 días
-        dia_actual = hoy + timedelta(days=i)
+        empleado_ids = {empleado_id for empleado_id, _ in pedidos_por_dia}
+        dias = {dia for _, dia in pedidos_por_dia}
 
-        agenda = db.query(Agenda).filter_by(
-            empleado_id=empleado_id,
-            dia=dia_actual
-        ).first()
+        # Agendas y turnos existentes de todos los (empleado, día) involucrados: dos consultas
+        agendas = {}
+        for empleado_id, dia, hora_inicio, hora_fin in db.query(
+            Agenda.empleado_id, Agenda.dia, Agenda.hora_inicio, Agenda.hora_fin
+        ).filter(Agenda.empleado_id.in_(empleado_ids), Agenda.dia.in_(dias)).all():
+            agendas.setdefault((empleado_id, dia), []).append((a_minutos(hora_inicio), a_minutos(hora_fin)))
 
-        if not agenda:
-            continue
+        ocupados = {}
+        for empleado_id, dia, hora_inicio, hora_fin in db.query(
+            TurnoModel.Turno.empleado_id, TurnoModel.Turno.dia, TurnoModel.Turno.hora_inicio, TurnoModel.Turno.hora_fin
+        ).filter(TurnoModel.Turno.empleado_id.in_(empleado_ids), TurnoModel.Turno.dia.in_(dias)).all():
+            ocupados.setdefault((empleado_id, dia), []).append((a_minutos(hora_inicio), a_minutos(hora_fin)))
+        ocupados = {clave: IndiceIntervalos(intervalos) for clave, intervalos in ocupados.items()}
 
-        hora_actual = datetime.combine(dia_actual, agenda.hora_inicio)
-        hora_fin = datetime.combine(dia_actual, agenda.hora_fin)
+        for n, item, inicio, fin in pedidos:
+            clave = (item.empleado_id, item.dia)
+            if clave not in agendas:
+                rechazar_reserva("batch", "fuera_de_rango", f"Turno {n}: el empleado no tiene agenda ese día.")
+            if not any(a_inicio <= inicio and fin <= a_fin for a_inicio, a_fin in agendas[clave]):
+                rechazar_reserva("batch", "fuera_de_rango", f"Turno {n}: fuera del rango horario disponible")
+            if clave in ocupados and ocupados[clave].solapa(inicio, fin):
+                rechazar_reserva("batch", "conflicto", f"Turno {n}: este horario ya está ocupado")
 
-        turnos_existentes = db.query(Turno).filter(
-            Turno.empleado_id == empleado_id,
-            Turno.fecha.between(hora_actual, hora_fin)
-        ).all()
+        cliente_id = obtener_o_crear_cliente(db, data.cliente_nombre, data.cliente_email, data.cliente_telefono)
 
-        horarios_ocupados = [
-            (turno.fecha, turno.fecha + timedelta(minutes=agenda.duracion_turno))
-            for turno in turnos_existentes
+        nuevos = [
+            TurnoModel.Turno(
+                dia=item.dia,
+                hora_inicio=item.hora_inicio,
+                hora_fin=(datetime.min + timedelta(minutes=fin)).time(),
+                cliente_nombre=data.cliente_nombre,
+                cliente_email=data.cliente_email,
+                cliente_telefono=data.cliente_telefono,
+                metodo_pago=data.metodo_pago,
+                monto_pagado=item.monto_pagado,
+                estado=data.estado,
+                servicio_id=item.servicio_id,
+                empleado_id=item.empleado_id,
+                cliente_id=cliente_id
+            )
+            for _, item, _, fin in pedidos
         ]
+        db.add_all(nuevos)
+        for turno in nuevos:
+            turno_creado(db, turno)
+        try:
+            db.flush()
+            # La respuesta sale de los valores ya cargados: después del commit los objetos
+            # quedan expirados y serializarlos los volvería a leer de a uno
+            creados = [ShowTurno.model_validate(turno) for turno in nuevos]
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            rechazar_reserva("batch", "conflicto", "Este horario ya está ocupado")
 
-        horarios_disponibles = []
-        while hora_actual + timedelta(minutes=agenda.duracion_turno) <= hora_fin:
-            inicio = hora_actual
-            fin = hora_actual + timedelta(minutes=agenda.duracion_turno)
+    for empleado_id, dia in pedidos_por_dia:
+        invalidar_disponibilidad(empleado_id, dia)
+    for _, item, inicio, fin in pedidos:
+        publicar_horario(db, OCUPADO, item.empleado_id, item.dia, item.hora_inicio,
+                         (datetime.min + timedelta(minutes=fin)).time())
+    contar_reserva("batch", "exito")
+    return creados
 
-            # Validar superposición
-            ocupado = any(
-                inicio < o_fin and fin > o_inicio
-                for o_inicio, o_fin in horarios_ocupados
-            )
+#DISPONIBILIDAD
+@router_publico.get("/disponibilidad/{empleado_id}")
+@en_threadpool
+def obtener_disponibilidad(empleado_id: int, request: Request, response: Response,
+                            dias: int = Query(DIAS_POR_DEFECTO, ge=1, le=90),
+                            paso: int | None = Query(None, ge=5, le=240),
+                            db: Session = Depends(get_db)):
+    # dias: horizonte en días desde hoy. paso: minutos entre inicios de slot
+    # (por defecto, la duración de turno de la agenda).
+    hoy = datetime.now().date()
+    # Si el cliente ya tiene esta versión, 304 sin calcular nada (ver app/core/condicional.py)
+    respuesta = no_modificado(request, response, validador_empleado(empleado_id, hoy, dias, paso))
+    if respuesta is not None:
+        return respuesta
+    if SLOTS_MATERIALIZADOS and paso is None:
+        return disponibilidad_desde_slots(db, empleado_id, hoy, dias)
+    return disponibilidad_empleado(db, empleado_id, hoy, dias=dias, paso=paso)
 
-            if not ocupado:
-                horarios_disponibles.append(inicio.strftime("%H:%M"))
+@router_publico.get("/negocios/{alias}/disponibilidad")
+@en_threadpool
+def obtener_disponibilidad_negocio(alias: str, request: Request, response: Response,
+                                    servicio_id: int | None = None,
+                                    dias: int = Query(DIAS_POR_DEFECTO, ge=1, le=90),
+                                    paso: int | None = Query(None, ge=5, le=240),
+                                    db: Session = Depends(get_db)):
+    negocio = obtener_negocio_por_alias(db, alias)
+    if not negocio:
+        raise HTTPException(status_code=404, detail="Negocio no encontrado")
+    hoy = datetime.now().date()
+    respuesta = no_modificado(request, response, validador_negocio(negocio.id, hoy, servicio_id, dias, paso))
+    if respuesta is not None:
+        return respuesta
 
-            hora_actual = fin
+    # Empleados del negocio; si se pide un servicio, solo los que lo ofrecen
+    # (mismo nombre de servicio) y con la duración de su propio servicio.
+    duraciones = None
+    if servicio_id is not None:
+        servicio = obtener_servicio(db, servicio_id)
+        if not servicio or servicio.negocio_id != negocio.id:
+            raise HTTPException(status_code=404, detail="Servicio no encontrado")
+        filas = db.query(User.id, User.nombre, ServicioModel.Servicio.duracion).join(
+            ServicioModel.Servicio, ServicioModel.Servicio.empleado_id == User.id
+        ).filter(
+            User.negocio_id == negocio.id,
+            User.rol == UserRole.empleado,
+            ServicioModel.Servicio.negocio_id == negocio.id,
+            ServicioModel.Servicio.nombre == servicio.nombre
+        ).all()
+        duraciones = {empleado_id: duracion for empleado_id, _, duracion in filas}
+    else:
+        filas = db.query(User.id, User.nombre).filter(
+            User.negocio_id == negocio.id,
+            User.rol == UserRole.empleado
+        ).all()
 
-        if horarios_disponibles:
-            dias_disponibles.append({
-                "fecha": dia_actual.isoformat(),
-                "horarios": horarios_disponibles
-            })
+    nombres = {fila[0]: fila[1] for fila in filas}
+    recordar_empleados(negocio.id, nombres)
+    por_empleado = disponibilidad_empleados(db, list(nombres), hoy, dias, paso, duraciones) if nombres else {}
 
-    return dias_disponibles
+    combinado = fusionar_empleados(por_empleado)
+    primer_turno = None
+    if combinado:
+        primero = combinado[0]["horarios"][0]
+        primer_turno = {"fecha": combinado[0]["fecha"], "hora": primero["hora"], "empleados": primero["empleados"]}
 
+    return {
+        "negocio_id": negocio.id,
+        "primer_turno": primer_turno,
+        "disponibilidad": combinado,
+        "empleados": [
+            {"empleado_id": empleado_id, "nombre": nombres[empleado_id], "dias": formatear_dias(dias_libres)}
+            for empleado_id, dias_libres in sorted(por_empleado.items())
+        ]
+    }
@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.schemas.negocio import NegocioCreate, NegocioUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from app.schemas.negocio import NegocioCreate, NegocioUpdate, NegocioOverview
 from app.models.negocio import Negocio
 from app.models.user import User, UserRole
 from app.utils.security import hash_password
 from app.core.deps import get_db
 from app.core.roles import verify_role
-from app.schemas.empleado import EmpleadoUpdate, EmpleadoCreate
+from app.core.deps import revocar_tokens, olvidar_usuario
+from app.schemas.empleado import EmpleadoUpdate, EmpleadoCreate, EmpleadoListado
 from app.models.servicio import Servicio
 from app.schemas.servicio import ServicioCreate, ServicioUpdate
 from app.models.turno import Turno
-from app.schemas.turno import TurnoCreate, TurnoUpdate
-
-router = APIRouter(prefix="/superadmin", tags=["Super Admin"])
+from app.schemas.turno import TurnoCreate, TurnoDetalle, TurnoUpdate
+from app.utils.disponibilidad import cache_disponibilidad, invalidar_disponibilidad
+from app.db.metricas import metricas_db
+from app.utils.paginacion import LIMITE_POR_DEFECTO, LIMITE_MAXIMO, paginar_por_id, paginar_turnos, filtrar_turnos
+from app.utils.exportacion import COLUMNAS, exportar_csv, exportar_ndjson
+from app.core.serializacion import RespuestaJSON, columnas, respuesta_filas
+from app.utils.slots import turno_cambiado, turno_creado
+from app.utils.turnos import escritura_turnos, horario_nuevo, validar_horario_turno
+from datetime import date
+from app.core.rutas import RutaDB
+from app.utils.eventos import LIBERADO, OCUPADO, bus_eventos, publicar_horario
+from app.utils.versiones import cambio_catalogo
+from app.utils.referencias import (cache_referencias, invalidar_empleado, invalidar_negocio, invalidar_servicio,
+                                   obtener_empleado, obtener_negocio)
+
+router = APIRouter(prefix="/superadmin", tags=["Super Admin"], route_class=RutaDB)
 
 @router.post("/negocios")
 def crear_negocio(data: NegocioCreate, 
@@ -56,9 +71,45 @@ def crear_negocio(data: NegocioCreate,
     }
 
 @router.get("/negocios")
-def listar_negocios(db: Session = Depends(get_db),
+def listar_negocios(response: Response,
+                    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                    after_id: int | None = None,
+                    provincia: str | None = None,
+                    db: Session = Depends(get_db),
                     current_user: User = Depends(verify_role("super_admin"))):
-    return db.query(Negocio).all()
+    query = db.query(Negocio)
+    if provincia is not None:
+        query = query.filter(Negocio.provincia == provincia)
+    return paginar_por_id(query, Negocio, limit, after_id, response)
+
+@router.get("/negocios/overview", response_model=list[NegocioOverview])
+def overview_negocios(response: Response,
+                      limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                      after_id: int | None = None,
+                      provincia: str | None = None,
+                      db: Session = Depends(get_db),
+                      current_user: User = Depends(verify_role("super_admin"))):
+    # Negocios con su admin, empleados y servicios: 3 consultas por página sin importar
+    # cuántos negocios traiga (negocios + usuarios + servicios con IN)
+    query = db.query(Negocio).options(selectinload(Negocio.usuarios), selectinload(Negocio.servicios))
+    if provincia is not None:
+        query = query.filter(Negocio.provincia == provincia)
+    negocios = paginar_por_id(query, Negocio, limit, after_id, response)
+
+    resultado = []
+    for negocio in negocios:
+        admins = [u for u in negocio.usuarios if u.rol == UserRole.admin]
+        resultado.append(NegocioOverview(
+            id=negocio.id,
+            nombre=negocio.nombre,
+            alias=negocio.alias,
+            direccion=negocio.direccion,
+            provincia=negocio.provincia,
+            admin=admins[0] if admins else None,
+            empleados=[u for u in negocio.usuarios if u.rol == UserRole.empleado],
+            servicios=negocio.servicios,
+        ))
+    return resultado
 
 @router.put("/negocios/{negocio_id}")
 def actualizar_negocio(negocio_id: int, update: NegocioUpdate,
@@ -68,10 +119,12 @@ def actualizar_negocio(negocio_id: int, update: NegocioUpdate,
     if not negocio:
         raise HTTPException(status_code=404, detail="Negocio no encontrado")
 
+    alias_anterior = negocio.alias
     for field, value in update.dict(exclude_unset=True).items():
         setattr(negocio, field, value)
 
     db.commit()
+    invalidar_negocio(negocio_id, alias_anterior)
     db.refresh(negocio)
     return negocio
 
@@ -83,8 +136,10 @@ def eliminar_negocio(negocio_id: int,
     if not negocio:
         raise HTTPException(status_code=404, detail="Negocio no encontrado")
 
+    alias = negocio.alias
     db.delete(negocio)
     db.commit()
+    invalidar_negocio(negocio_id, alias)
     return {"mensaje": "Negocio eliminado"}
 
 @router.get("/negocios/{negocio_id}/empleados")
@@ -93,7 +148,7 @@ def listar_empleados_por_negocio(
     db: Session = Depends(get_db),
     current_user: User = Depends(verify_role("super_admin"))
 ):
-    negocio = db.query(Negocio).filter(Negocio.id == negocio_id).first()
+    negocio = obtener_negocio(db, negocio_id)
     if not negocio:
         raise HTTPException(status_code=404, detail="Negocio no encontrado")
 
@@ -111,7 +166,7 @@ def listar_servicios_de_negocio(
     db: Session = Depends(get_db),
     current_user: User = Depends(verify_role("super_admin"))
 ):
-    negocio = db.query(Negocio).filter(Negocio.id == negocio_id).first()
+    negocio = obtener_negocio(db, negocio_id)
     if not negocio:
         raise HTTPException(status_code=404, detail="Negocio no encontrado")
 
@@ -126,13 +181,8 @@ def listar_servicios_empleado_de_negocio(
     db: Session = Depends(get_db),
     current_user: User = Depends(verify_role("super_admin"))
 ):
-    empleado = db.query(User).filter(
-        User.id == empleado_id,
-        User.negocio_id == negocio_id,
-        User.rol == UserRole.empleado
-    ).first()
-
-    if not empleado:
+    empleado = obtener_empleado(db, empleado_id)
+    if not empleado or empleado.rol != UserRole.empleado or empleado.negocio_id != negocio_id:
         raise HTTPException(status_code=404, detail="Empleado no encontrado en este negocio")
 
     servicios = db.query(Servicio).filter(
@@ -162,6 +212,7 @@ def crear_empleado(data: EmpleadoCreate,
     )
     db.add(nuevo_empleado)
     db.commit()
+    cambio_catalogo()
     db.refresh(nuevo_empleado)
     return {"mensaje": "Empleado creado correctamente", "empleado_id": nuevo_empleado.id}
 
@@ -172,12 +223,8 @@ def crear_servicio_para_empleado(
     db: Session = Depends(get_db),
     current_user: User = Depends(verify_role("super_admin"))
 ):
-    empleado = db.query(User).filter(
-        User.id == empleado_id,
-        User.rol == UserRole.empleado
-    ).first()
-
-    if not empleado:
+    empleado = obtener_empleado(db, empleado_id)
+    if not empleado or empleado.rol != UserRole.empleado:
         raise HTTPException(status_code=404, detail="Empleado no encontrado")
 
     nuevo_servicio = Servicio(
@@ -190,6 +237,7 @@ def crear_servicio_para_empleado(
     )
     db.add(nuevo_servicio)
     db.commit()
+    cambio_catalogo()
     db.refresh(nuevo_servicio)
 
     return {
@@ -197,10 +245,17 @@ def crear_servicio_para_empleado(
         "servicio_id": nuevo_servicio.id
     }
 
-@router.get("/empleados")
-def listar_todos_empleados(db: Session = Depends(get_db),
+@router.get("/empleados", response_class=RespuestaJSON, responses={200: {"model": list[EmpleadoListado]}})
+def listar_todos_empleados(response: Response,
+                            limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                            after_id: int | None = None,
+                            negocio_id: int | None = None,
+                            db: Session = Depends(get_db),
                             current_user: User = Depends(verify_role("super_admin"))):
-    return db.query(User).filter(User.rol == UserRole.empleado).all()
+    query = db.query(User.id, User.nombre, User.email, User.rol, User.negocio_id).filter(User.rol == UserRole.empleado)
+    if negocio_id is not None:
+        query = query.filter(User.negocio_id == negocio_id)
+    return respuesta_filas(paginar_por_id(query, User, limit, after_id, response), response)
 
 @router.put("/empleados/{empleado_id}")
 def editar_empleado(empleado_id: int, update: EmpleadoUpdate,
@@ -211,9 +266,15 @@ def editar_empleado(empleado_id: int, update: EmpleadoUpdate,
         raise HTTPException(status_code=404, detail="Empleado no encontrado")
 
     for field, value in update.dict(exclude_unset=True).items():
-        setattr(empleado, field, value)
+        if field == "password":
+            empleado.hashed_password = hash_password(value)
+            revocar_tokens(empleado)
+        else:
+            setattr(empleado, field, value)
 
     db.commit()
+    invalidar_empleado(empleado_id)
+    olvidar_usuario(empleado.id)
     db.refresh(empleado)
     return empleado
 
@@ -227,6 +288,8 @@ def eliminar_empleado(empleado_id: int,
 
     db.delete(empleado)
     db.commit()
+    invalidar_empleado(empleado_id)
+    olvidar_usuario(empleado_id)
     return {"mensaje": "Empleado eliminado correctamente"}
 
 # CRUD Servicios
@@ -238,6 +301,7 @@ def crear_servicio(data: ServicioCreate,
     nuevo = Servicio(**data.dict())
     db.add(nuevo)
     db.commit()
+    cambio_catalogo()
     db.refresh(nuevo)
     return nuevo
 
@@ -261,6 +325,7 @@ def editar_servicio(servicio_id: int, update: ServicioUpdate,
     for field, value in update.dict(exclude_unset=True).items():
         setattr(servicio, field, value)
     db.commit()
+    invalidar_servicio(servicio_id)
     db.refresh(servicio)
     return servicio
 
@@ -273,6 +338,7 @@ def eliminar_servicio(servicio_id: int,
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
     db.delete(servicio)
     db.commit()
+    invalidar_servicio(servicio_id)
     return {"mensaje": "Servicio eliminado"}
 
 # Turnos
@@ -281,16 +347,49 @@ def eliminar_servicio(servicio_id: int,
 def crear_turno(data: TurnoCreate,
                 db: Session = Depends(get_db),
                 current_user: User = Depends(verify_role("super_admin"))):
-    nuevo = Turno(**data.dict())
-    db.add(nuevo)
-    db.commit()
+    with escritura_turnos(db, [(data.empleado_id, data.dia)]):
+        validar_horario_turno(db, data.empleado_id, data.dia, data.hora_inicio, data.hora_fin)
+        nuevo = Turno(**data.dict())
+        db.add(nuevo)
+        turno_creado(db, nuevo)
+        db.commit()
     db.refresh(nuevo)
+    invalidar_disponibilidad(nuevo.empleado_id, nuevo.dia)
+    publicar_horario(db, OCUPADO, nuevo.empleado_id, nuevo.dia, nuevo.hora_inicio, nuevo.hora_fin)
     return nuevo
 
-@router.get("/turnos")
-def listar_turnos(db: Session = Depends(get_db),
+@router.get("/turnos", response_class=RespuestaJSON, responses={200: {"model": list[TurnoDetalle]}})
+def listar_turnos(response: Response,
+                    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                    cursor: str | None = None,
+                    desde: date | None = None,
+                    hasta: date | None = None,
+                    estado: str | None = None,
+                    negocio_id: int | None = None,
+                    empleado_id: int | None = None,
+                    db: Session = Depends(get_db),
                     current_user: User = Depends(verify_role("super_admin"))):
-    return db.query(Turno).all()
+    query = filtrar_turnos(db.query(*columnas(Turno, COLUMNAS)), desde, hasta, estado)
+    if empleado_id is not None:
+        query = query.filter(Turno.empleado_id == empleado_id)
+    if negocio_id is not None:
+        empleados_negocio = db.query(User.id).filter(User.negocio_id == negocio_id)
+        query = query.filter(Turno.empleado_id.in_(empleados_negocio))
+    return respuesta_filas(paginar_turnos(query, limit, cursor, response), response)
+
+# Exportación para reportes: NDJSON o CSV en streaming, memoria constante
+@router.get("/turnos/export")
+def exportar_turnos(formato: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+                    negocio_id: int | None = None,
+                    empleado_id: int | None = None,
+                    desde: date | None = None,
+                    hasta: date | None = None,
+                    current_user: User = Depends(verify_role("super_admin"))):
+    filtros = dict(negocio_id=negocio_id, empleado_id=empleado_id, desde=desde, hasta=hasta)
+    if formato == "csv":
+        return StreamingResponse(exportar_csv(**filtros), media_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="turnos.csv"'})
+    return StreamingResponse(exportar_ndjson(**filtros), media_type="application/x-ndjson")
 
 @router.put("/turnos/{turno_id}")
 def actualizar_turno(turno_id: int, update: TurnoUpdate,
@@ -299,10 +398,22 @@ def actualizar_turno(turno_id: int, update: TurnoUpdate,
     turno = db.query(Turno).filter(Turno.id == turno_id).first()
     if not turno:
         raise HTTPException(status_code=404, detail="Turno no encontrado")
-    for field, value in update.dict(exclude_unset=True).items():
-        setattr(turno, field, value)
-    db.commit()
+    dia_anterior = turno.dia
+    horario_anterior = (turno.dia, turno.hora_inicio, turno.hora_fin)
+    cambios = update.dict(exclude_unset=True)
+    horario = horario_nuevo(turno, cambios)
+    with escritura_turnos(db, {(turno.empleado_id, dia_anterior), (turno.empleado_id, horario[0])}):
+        if horario != horario_anterior:
+            validar_horario_turno(db, turno.empleado_id, *horario, excluir_id=turno.id)
+        for field, value in cambios.items():
+            setattr(turno, field, value)
+        turno_cambiado(db, turno.empleado_id, dia_anterior, turno.dia)
+        db.commit()
     db.refresh(turno)
+    invalidar_disponibilidad(turno.empleado_id, dia_anterior, turno.dia)
+    if (turno.dia, turno.hora_inicio, turno.hora_fin) != horario_anterior:
+        publicar_horario(db, LIBERADO, turno.empleado_id, *horario_anterior)
+        publicar_horario(db, OCUPADO, turno.empleado_id, turno.dia, turno.hora_inicio, turno.hora_fin)
     return turno
 
 @router.delete("/turnos/{turno_id}")
@@ -312,6 +423,28 @@ def eliminar_turno(turno_id: int,
     turno = db.query(Turno).filter(Turno.id == turno_id).first()
     if not turno:
         raise HTTPException(status_code=404, detail="Turno no encontrado")
+    empleado_id, dia, hora_inicio, hora_fin = turno.empleado_id, turno.dia, turno.hora_inicio, turno.hora_fin
     db.delete(turno)
+    turno_cambiado(db, empleado_id, dia)
     db.commit()
-    return {"mensaje": "Turno eliminado"}
\ No newline at end of file
+    invalidar_disponibilidad(empleado_id, dia)
+    publicar_horario(db, LIBERADO, empleado_id, dia, hora_inicio, hora_fin)
+    return {"mensaje": "Turno eliminado"}
+
+# Monitoreo
+
+@router.get("/cache/disponibilidad")
+def estadisticas_cache_disponibilidad(current_user: User = Depends(verify_role("super_admin"))):
+    return cache_disponibilidad.estadisticas()
+
+@router.get("/cache/referencias")
+def estadisticas_cache_referencias(current_user: User = Depends(verify_role("super_admin"))):
+    return cache_referencias.estadisticas()
+
+@router.get("/eventos")
+def estadisticas_eventos(current_user: User = Depends(verify_role("super_admin"))):
+    return bus_eventos.estadisticas()
+
+@router.get("/db/metricas")
+def estadisticas_db(current_user: User = Depends(verify_role("super_admin"))):
+    return metricas_db.estadisticas()
\ No newline at end of file
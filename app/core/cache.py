@@ -0,0 +1,103 @@
+#CACHE EN MEMORIA
+# Cache LRU con TTL, segura entre hilos (los endpoints sync corren en el threadpool).
+# El almacenamiento es intercambiable: cualquier objeto con get/set/delete/clear/__len__
+# sirve (p. ej. un almacén local compartido entre procesos). Cada entrada puede llevar
+# una versión: si al leer se pide otra versión, la entrada cuenta como fallo.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class AlmacenMemoria:
+    def __init__(self, max_entradas: int):
+        self.max_entradas = max_entradas
+        self.datos = OrderedDict()
+        self.desalojos = 0
+
+    def get(self, clave):
+        valor = self.datos.get(clave)
+        if valor is not None:
+            self.datos.move_to_end(clave)
+        return valor
+
+    def set(self, clave, valor):
+        self.datos[clave] = valor
+        self.datos.move_to_end(clave)
+        while len(self.datos) > self.max_entradas:
+            self.datos.popitem(last=False)
+            self.desalojos += 1
+
+    def delete(self, clave):
+        self.datos.pop(clave, None)
+
+    def clear(self):
+        self.datos.clear()
+
+    def __len__(self):
+        return len(self.datos)
+
+
+class CacheTTL:
+    def __init__(self, nombre: str, ttl: float, max_entradas: int, almacen=None):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.almacen = almacen if almacen is not None else AlmacenMemoria(max_entradas)
+        self.lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    @property
+    def activa(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, clave, version: int = 0):
+        if not self.activa:
+            return None
+        with self.lock:
+            entrada = self.almacen.get(clave)
+            if entrada is not None:
+                vence, version_guardada, valor = entrada
+                if vence > time.monotonic() and version_guardada == version:
+                    self.aciertos += 1
+                    return valor
+                self.almacen.delete(clave)
+            self.fallos += 1
+            return None
+
+    def set(self, clave, valor, version: int = 0):
+        if not self.activa:
+            return
+        with self.lock:
+            self.almacen.set(clave, (time.monotonic() + self.ttl, version, valor))
+
+    def delete(self, clave):
+        with self.lock:
+            self.almacen.delete(clave)
+
+    def limpiar(self):
+        with self.lock:
+            self.almacen.clear()
+
+    def estadisticas(self) -> dict:
+        with self.lock:
+            total = self.aciertos + self.fallos
+            return {
+                "nombre": self.nombre,
+                "entradas": len(self.almacen),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+                "desalojos": getattr(self.almacen, "desalojos", 0),
+                "ttl": self.ttl,
+            }
+
+
+def cache_desde_entorno(nombre: str, prefijo: str, ttl: float, max_entradas: int) -> CacheTTL:
+    """Crea una cache leyendo <PREFIJO>_TTL y <PREFIJO>_MAX del entorno (TTL=0 la desactiva)."""
+    return CacheTTL(
+        nombre,
+        ttl=float(os.getenv(f"{prefijo}_TTL", ttl)),
+        max_entradas=int(os.getenv(f"{prefijo}_MAX", max_entradas)),
+    )
@@ -0,0 +1,50 @@
+#RESPUESTAS CONDICIONALES (ETag / Last-Modified)
+# Los endpoints públicos de lectura arman un Validador (ver app/utils/versiones.py) antes
+# de hacer el trabajo caro y llaman a no_modificado(): si el cliente o el proxy ya tienen
+# esa versión se devuelve 304 sin cuerpo; si no, se agregan ETag, Last-Modified y
+# Cache-Control a la respuesta normal.
+#   DISPONIBILIDAD_MAX_AGE: segundos que un proxy/CDN puede servirla sin revalidar (15)
+
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request, Response
+
+DISPONIBILIDAD_MAX_AGE = int(os.getenv("DISPONIBILIDAD_MAX_AGE", 15))
+
+
+def _coincide_etag(if_none_match: str, etag: str) -> bool:
+    # Comparación débil (RFC 9110): W/"x" y "x" son la misma versión
+    if if_none_match.strip() == "*":
+        return True
+    propio = etag.removeprefix("W/")
+    return any(candidato.strip().removeprefix("W/") == propio for candidato in if_none_match.split(","))
+
+
+def _sin_cambios_desde(if_modified_since: str, ultima_modificacion: float) -> bool:
+    try:
+        return int(ultima_modificacion) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def no_modificado(request: Request, response: Response, validador,
+                  max_age: int = DISPONIBILIDAD_MAX_AGE) -> Response | None:
+    """Devuelve un 304 listo para retornar, o None después de poner los encabezados de
+    cache en `response` (el Response inyectado por FastAPI en el handler)."""
+    encabezados = {
+        "ETag": validador.etag,
+        "Last-Modified": formatdate(validador.ultima_modificacion, usegmt=True),
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Si viene If-None-Match, If-Modified-Since se ignora (este tiene resolución de
+        # un segundo: alcanza para clientes simples, los navegadores mandan el ETag)
+        sin_cambios = _coincide_etag(if_none_match, validador.etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        sin_cambios = if_modified_since is not None and _sin_cambios_desde(if_modified_since, validador.ultima_modificacion)
+    if sin_cambios:
+        return Response(status_code=304, headers=encabezados)
+    response.headers.update(encabezados)
+    return None
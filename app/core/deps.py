@@ -1,41 +1,141 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from app.db.session import SessionLocal
+from app.db.session import get_db, get_async_db
+from app.core.cache import cache_desde_entorno
+from app.core.logs import actualizar_contexto
 from app.models.user import User
+import logging
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
+# Modo stateless (AUTH_STATELESS=1): los roles se validan con los claims del token y
+# el usuario completo sale de una cache con TTL en vez de consultarse en cada request.
+# Un token se revoca subiendo User.token_version (claim "ver"); en otros workers el
+# cambio se ve cuando vence la cache (USUARIOS_CACHE_TTL, por defecto 30 s).
+AUTH_STATELESS = os.getenv("AUTH_STATELESS", "0").lower() in ("1", "true", "si")
+
+cache_usuarios = cache_desde_entorno("usuarios", "USUARIOS_CACHE", ttl=30, max_entradas=5000)
+cache_versiones_token = cache_desde_entorno("versiones_token", "USUARIOS_CACHE", ttl=30, max_entradas=50000)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class UsuarioToken:
+    """Usuario armado solo con los claims del token (id, rol, negocio_id)."""
+    __slots__ = ("id", "rol", "negocio_id", "token_version")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+    def __init__(self, id: int, rol: str, negocio_id: int | None, token_version: int):
+        self.id = id
+        self.rol = rol
+        self.negocio_id = negocio_id
+        self.token_version = token_version
+
+def _credenciales_invalidas():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciales inválidas",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decodificar_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(f"🧠 Payload decodificado: {payload}")
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
+        if payload.get("sub") is None:
+            raise _credenciales_invalidas()
     except JWTError:
-        raise credentials_exception
+        logger.debug("token inválido")
+        raise _credenciales_invalidas()
+    # Nunca el payload completo en los logs: solo identificadores
+    actualizar_contexto(usuario_id=payload["sub"])
+    logger.debug("token decodificado", extra={"rol": payload.get("rol"), "ver": payload.get("ver", 0)})
+    return payload
+
+def verificar_version(payload: dict, token_version: int):
+    if payload.get("ver", 0) != (token_version or 0):
+        raise _credenciales_invalidas()
+
+def revocar_tokens(user: User):
+    """Sube la versión de token del usuario: todos sus tokens emitidos dejan de valer.
+    Después del commit llamar a olvidar_usuario para que este worker lo vea al instante."""
+    user.token_version = (user.token_version or 0) + 1
+
+def olvidar_usuario(user_id: int):
+    cache_usuarios.delete(user_id)
+    cache_versiones_token.delete(user_id)
+
+def _usuario_desde_claims(payload: dict, token_version: int) -> UsuarioToken:
+    return UsuarioToken(int(payload["sub"]), payload["rol"], payload.get("negocio_id"), token_version)
 
-    user = db.query(User).filter(User.id == user_id).first()
+def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)) -> User:
+    payload = decodificar_token(token)
+    user_id = int(payload["sub"])
+
+    user = cache_usuarios.get(user_id) if AUTH_STATELESS else None
+    if user is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            raise _credenciales_invalidas()
+        if AUTH_STATELESS:
+            # Se guarda desligado de la sesión para que un commit no lo expire
+            db.expunge(user)
+            cache_usuarios.set(user_id, user)
+    verificar_version(payload, user.token_version)
+    return user
+
+def get_usuario_token(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
+    """Para verify_role en modo stateless: solo consulta la DB si la versión del token
+    no está en cache. Tokens viejos sin claims de negocio caen a get_current_user."""
+    payload = decodificar_token(token)
+    if "rol" not in payload or "negocio_id" not in payload:
+        return get_current_user(token, db)
+
+    user_id = int(payload["sub"])
+    version = cache_versiones_token.get(user_id)
+    if version is None:
+        fila = db.query(User.token_version).filter(User.id == user_id).first()
+        if fila is None:
+            raise _credenciales_invalidas()
+        version = fila[0] or 0
+        cache_versiones_token.set(user_id, version)
+    verificar_version(payload, version)
+    return _usuario_desde_claims(payload, version)
+
+# Versiones para DB_ASYNC: comparten la AsyncSession del request con el endpoint
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)) -> User:
+    payload = decodificar_token(token)
+    user_id = int(payload["sub"])
+
+    user = cache_usuarios.get(user_id) if AUTH_STATELESS else None
     if user is None:
-        raise credentials_exception
+        user = await db.get(User, user_id)
+        if user is None:
+            raise _credenciales_invalidas()
+        if AUTH_STATELESS:
+            # Se guarda desligado de la sesión para que un commit no lo expire
+            db.expunge(user)
+            cache_usuarios.set(user_id, user)
+    verificar_version(payload, user.token_version)
     return user
+
+async def get_usuario_token_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)):
+    payload = decodificar_token(token)
+    if "rol" not in payload or "negocio_id" not in payload:
+        return await get_current_user_async(token, db)
+
+    user_id = int(payload["sub"])
+    version = cache_versiones_token.get(user_id)
+    if version is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            raise _credenciales_invalidas()
+        version = user.token_version or 0
+        cache_versiones_token.set(user_id, version)
+    verificar_version(payload, version)
+    return _usuario_desde_claims(payload, version)
@@ -0,0 +1,152 @@
+#LOGGING ESTRUCTURADO
+# Una línea JSON por evento, con el id de request, el usuario y la ruta del request en
+# curso. Los handlers reales corren en un hilo aparte detrás de una cola (QueueHandler +
+# QueueListener): el worker que loguea solo encola y nunca espera a stdout.
+#
+# LOG_NIVEL: nivel general (INFO por defecto).
+# LOG_NIVELES: niveles por módulo, p. ej. "app.core.deps=DEBUG,sqlalchemy.engine=WARNING".
+# LOG_FORMATO: "json" (por defecto) o "texto" para leer en consola durante el desarrollo.
+# LOG_MUESTREO_DEBUG: fracción de eventos DEBUG que se emiten (1 = todos), para poder
+# dejar DEBUG prendido en rutas calientes sin inundar la salida.
+# LOG_COLA_MAX: eventos encolados como máximo; si se llena, se descartan y se cuentan.
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+LOG_NIVELES = os.getenv("LOG_NIVELES", "")
+LOG_FORMATO = os.getenv("LOG_FORMATO", "json").lower()
+LOG_MUESTREO_DEBUG = float(os.getenv("LOG_MUESTREO_DEBUG", 1))
+LOG_COLA_MAX = int(os.getenv("LOG_COLA_MAX", 10000))
+
+# Contexto del request en curso. Es un dict compartido (no se reemplaza): lo que las
+# dependencias agregan desde el threadpool lo ve también el middleware.
+contexto_log: ContextVar = ContextVar("contexto_log", default=None)
+
+# Atributos propios de LogRecord; el resto son los extra=... del llamador
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def actualizar_contexto(**campos):
+    contexto = contexto_log.get()
+    if contexto is not None:
+        contexto.update(campos)
+
+
+class FiltroContexto(logging.Filter):
+    """Copia el contexto del request al record en el hilo que loguea (en el listener
+    el contextvar ya no es visible)."""
+
+    def filter(self, record):
+        contexto = contexto_log.get()
+        if contexto:
+            for clave, valor in contexto.items():
+                if not hasattr(record, clave):
+                    setattr(record, clave, valor)
+        return True
+
+
+class FiltroMuestreo(logging.Filter):
+    def __init__(self, tasa: float):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.tasa >= 1 or random.random() < self.tasa
+
+
+class FormateadorJSON(logging.Formatter):
+    def format(self, record):
+        evento = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_RECORD and not clave.startswith("_"):
+                evento[clave] = valor
+        if record.exc_info:
+            evento["excepcion"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            evento["excepcion"] = record.exc_text
+        if record.stack_info:
+            evento["pila"] = record.stack_info
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+class HandlerCola(logging.handlers.QueueHandler):
+    """No bloquea nunca: con la cola llena el evento se descarta."""
+
+    def __init__(self, cola):
+        super().__init__(cola)
+        self.descartados = 0
+
+    def prepare(self, record):
+        # QueueHandler.prepare pega el traceback al mensaje y borra exc_info. Acá el
+        # traceback se formatea una vez en exc_text (el listener no puede hacerlo: el
+        # frame ya cambió) y el mensaje queda limpio, para el campo "excepcion".
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+_listener = None
+
+
+def _niveles_por_modulo(texto: str) -> dict:
+    niveles = {}
+    for par in filter(None, (p.strip() for p in texto.split(","))):
+        modulo, _, nivel = par.partition("=")
+        niveles[modulo.strip()] = nivel.strip().upper()
+    return niveles
+
+
+def configurar_logging():
+    """Instala la cola y el listener en el logger raíz. Idempotente."""
+    global _listener
+    if _listener is not None:
+        return
+    salida = logging.StreamHandler(sys.stdout)
+    if LOG_FORMATO == "texto":
+        salida.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    else:
+        salida.setFormatter(FormateadorJSON())
+
+    cola = queue.Queue(maxsize=LOG_COLA_MAX)
+    handler = HandlerCola(cola)
+    handler.addFilter(FiltroMuestreo(LOG_MUESTREO_DEBUG))
+    handler.addFilter(FiltroContexto())
+
+    raiz = logging.getLogger()
+    raiz.handlers = [handler]
+    raiz.setLevel(LOG_NIVEL)
+    for modulo, nivel in _niveles_por_modulo(LOG_NIVELES).items():
+        logging.getLogger(modulo).setLevel(nivel)
+    # uvicorn trae sus propios handlers; que sus eventos pasen por la misma cola
+    for nombre in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logging.getLogger(nombre).handlers = []
+        logging.getLogger(nombre).propagate = True
+
+    _listener = logging.handlers.QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
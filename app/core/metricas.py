@@ -0,0 +1,123 @@
+#MÉTRICAS EN FORMATO PROMETHEUS
+# Contadores, gauges e histogramas en memoria del proceso, expuestos en texto plano en
+# /metrics para que un Prometheus local (o un curl) los lea. Sin dependencias externas:
+# con varios workers cada proceso expone los suyos.
+
+import threading
+from bisect import bisect_left
+from app.db.metricas import metricas_db
+
+# Límites superiores (segundos) de los buckets de latencia, los de Prometheus por defecto
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _etiquetas(nombres, valores) -> str:
+    if not nombres:
+        return ""
+    pares = ",".join(f'{n}="{v}"' for n, v in zip(nombres, valores))
+    return "{" + pares + "}"
+
+
+class Contador:
+    def __init__(self, nombre: str, ayuda: str, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.lock = threading.Lock()
+        self.valores = {}
+
+    def inc(self, *valores, cantidad: float = 1):
+        with self.lock:
+            self.valores[valores] = self.valores.get(valores, 0) + cantidad
+
+    def exponer(self, tipo: str = "counter"):
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} {tipo}"
+        with self.lock:
+            for valores, total in sorted(self.valores.items()):
+                yield f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {total}"
+
+
+class Gauge(Contador):
+    def dec(self, *valores, cantidad: float = 1):
+        self.inc(*valores, cantidad=-cantidad)
+
+    def exponer(self, tipo: str = "gauge"):
+        return super().exponer(tipo)
+
+
+class Histograma:
+    def __init__(self, nombre: str, ayuda: str, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # etiquetas -> [conteos por bucket (+Inf al final), suma]
+        self.series = {}
+
+    def observar(self, valor: float, *valores):
+        i = bisect_left(self.buckets, valor)
+        with self.lock:
+            serie = self.series.get(valores)
+            if serie is None:
+                serie = self.series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][i] += 1
+            serie[1] += valor
+
+    def exponer(self):
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} histogram"
+        nombres_bucket = self.etiquetas + ("le",)
+        with self.lock:
+            for valores, (conteos, suma) in sorted(self.series.items()):
+                acumulado = 0
+                for limite, conteo in zip(self.buckets + ("+Inf",), conteos):
+                    acumulado += conteo
+                    yield f"{self.nombre}_bucket{_etiquetas(nombres_bucket, valores + (limite,))} {acumulado}"
+                yield f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {suma}"
+                yield f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}"
+
+
+requests_total = Contador("http_requests_total", "Requests atendidos.", ("metodo", "ruta", "estado"))
+duracion_requests = Histograma("http_request_duracion_segundos", "Latencia de los requests.", ("metodo", "ruta"))
+requests_en_curso = Gauge("http_requests_en_curso", "Requests en curso.")
+requests_en_curso.inc(cantidad=0)
+reservas_total = Contador("reservas_total", "Pedidos de reserva por resultado.", ("endpoint", "resultado"))
+
+
+def medir_request(metodo: str, ruta: str, estado: int, segundos: float):
+    requests_total.inc(metodo, ruta, estado)
+    duracion_requests.observar(segundos, metodo, ruta)
+
+
+def contar_reserva(endpoint: str, resultado: str):
+    """resultado: exito, conflicto, fuera_de_rango o servicio_inexistente."""
+    reservas_total.inc(endpoint, resultado)
+
+
+def _metricas_db():
+    estadisticas = metricas_db.estadisticas()
+    yield "# HELP db_pool_conexiones Conexiones del pool por estado."
+    yield "# TYPE db_pool_conexiones gauge"
+    for n, pool in enumerate(estadisticas["pools"]):
+        for estado in ("en_uso", "libres", "overflow"):
+            yield f'db_pool_conexiones{{pool="{n}",estado="{estado}"}} {pool[estado]}'
+    yield "# HELP db_pool_checkouts_total Conexiones pedidas al pool."
+    yield "# TYPE db_pool_checkouts_total counter"
+    yield f"db_pool_checkouts_total {estadisticas['checkouts']}"
+    yield "# HELP db_pool_espera_segundos_total Tiempo total esperando una conexión del pool."
+    yield "# TYPE db_pool_espera_segundos_total counter"
+    yield f"db_pool_espera_segundos_total {metricas_db.espera_total}"
+    yield "# HELP db_consultas_total Sentencias SQL ejecutadas."
+    yield "# TYPE db_consultas_total counter"
+    yield f"db_consultas_total {estadisticas['consultas_total']}"
+
+
+def exponer_metricas() -> str:
+    lineas = []
+    for metrica in (requests_total, duracion_requests, requests_en_curso, reservas_total):
+        lineas.extend(metrica.exponer())
+    lineas.extend(_metricas_db())
+    return "\n".join(lineas) + "\n"
+
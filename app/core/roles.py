@@ -1,14 +1,20 @@
 #VALIDAR ROLES
 
 from fastapi import Depends, HTTPException, status
-from app.core.deps import get_current_user
+from app.core.deps import AUTH_STATELESS, get_current_user, get_usuario_token
 from app.models.user import User
+import logging
+
+logger = logging.getLogger(__name__)
 
 def verify_role(required_role: str):
-    def role_dependency(current_user: User = Depends(get_current_user)):
+    # En modo stateless alcanza con los claims del token (ver app/core/deps.py)
+    usuario_actual = get_usuario_token if AUTH_STATELESS else get_current_user
+
+    def role_dependency(current_user: User = Depends(usuario_actual)):
         actual_role = str(getattr(current_user.rol, "value", current_user.rol))
-        print(f"🔍 Verificando rol: actual = {actual_role} | requerido = {required_role}")
         if actual_role != required_role:
+            logger.info("acceso denegado por rol", extra={"rol": actual_role, "rol_requerido": required_role})
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Acceso denegado: se requiere rol '{required_role}'"
@@ -0,0 +1,60 @@
+#RUTAS SYNC/ASYNC
+# Los endpoints se escriben una sola vez, como funciones sync que reciben
+# `db: Session = Depends(get_db)`. Con DB_ASYNC=1 esta clase de ruta los convierte en
+# corrutinas que reciben una AsyncSession y ejecutan el cuerpo con `run_sync`: las
+# consultas viajan por el driver async y no ocupan un hilo del threadpool por request.
+#
+# Costo: el cuerpo entero corre en el hilo del event loop, no solo las consultas. Un
+# endpoint con mucho cálculo en Python (el barrido de disponibilidad de hasta 90 días
+# por todos los empleados de un negocio) frena a todos los demás requests del worker.
+# Esos endpoints se marcan con @en_threadpool: quedan sync, con la sesión del motor
+# sync, y FastAPI los corre en el threadpool como sin DB_ASYNC.
+
+import inspect
+from fastapi import Depends
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+from app.db import session as db_session
+
+
+def _parametro_db(endpoint):
+    """Nombre del parámetro que recibe la sesión sync, o None."""
+    for nombre, parametro in inspect.signature(endpoint).parameters.items():
+        default = parametro.default
+        if isinstance(default, DependsParam) and default.dependency is db_session.get_db:
+            return nombre
+    return None
+
+
+def en_threadpool(endpoint):
+    """Deja el endpoint en el threadpool aun con DB_ASYNC=1 (cálculo pesado en Python)."""
+    endpoint.en_threadpool = True
+    return endpoint
+
+
+def a_async(endpoint):
+    nombre_db = _parametro_db(endpoint)
+    if nombre_db is None or inspect.iscoroutinefunction(endpoint) or getattr(endpoint, "en_threadpool", False):
+        return endpoint
+
+    async def endpoint_async(**kwargs):
+        db = kwargs.pop(nombre_db)
+        return await db.run_sync(lambda sesion: endpoint(**{nombre_db: sesion}, **kwargs))
+
+    firma = inspect.signature(endpoint)
+    firma = firma.replace(parameters=[
+        p.replace(default=Depends(db_session.get_async_db), annotation=inspect.Parameter.empty)
+        if p.name == nombre_db else p
+        for p in firma.parameters.values()
+    ])
+    endpoint_async.__signature__ = firma
+    endpoint_async.__name__ = endpoint.__name__
+    endpoint_async.__doc__ = endpoint.__doc__
+    return endpoint_async
+
+
+class RutaDB(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        if db_session.DB_ASYNC:
+            endpoint = a_async(endpoint)
+        super().__init__(path, endpoint, **kwargs)
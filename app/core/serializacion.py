@@ -0,0 +1,64 @@
+#SERIALIZACIÓN RÁPIDA DE LISTADOS
+# Los listados grandes no pasan por objetos ORM ni por jsonable_encoder: se consultan solo
+# las columnas de la respuesta (db.query(Modelo.col, ...), filas tipo tupla), se arman
+# dicts y se codifican con orjson (o con json de la librería estándar si no está).
+# Las filas salen de nuestra propia DB, así que por defecto no se revalidan; con
+# `esquema` (un TypeAdapter de un modelo Pydantic from_attributes) se validan y las
+# codifica pydantic-core.
+# Ver benchmarks/bench_serializacion.py.
+
+import enum
+import json
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _por_defecto(valor):
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    raise TypeError(f"{type(valor).__name__} no es serializable a JSON")
+
+
+def a_json(contenido) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(contenido)
+    return json.dumps(contenido, default=_por_defecto, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class RespuestaJSON(Response):
+    media_type = "application/json"
+
+    def render(self, contenido) -> bytes:
+        # bytes: JSON ya codificado (p. ej. por TypeAdapter.dump_json)
+        return contenido if isinstance(contenido, bytes) else a_json(contenido)
+
+
+def columnas(modelo, campos) -> list:
+    """Columnas del modelo ORM para los campos dados (p. ej. los de un esquema)."""
+    return [getattr(modelo, campo) for campo in campos]
+
+
+def filas_a_dicts(filas) -> list[dict]:
+    if not filas:
+        return []
+    claves = filas[0]._fields
+    return [dict(zip(claves, fila)) for fila in filas]
+
+
+def respuesta_filas(filas, response: Response | None = None, esquema=None) -> RespuestaJSON:
+    """Lista JSON a partir de filas de columnas. `response` es el Response inyectado en el
+    handler: sus encabezados (p. ej. el cursor de paginación) pasan a la respuesta."""
+    encabezados = None
+    if response is not None:
+        encabezados = {clave: valor for clave, valor in response.headers.items() if clave != "content-length"}
+    if esquema is not None:
+        contenido = esquema.dump_json(esquema.validate_python(filas, from_attributes=True))
+    else:
+        contenido = filas_a_dicts(filas)
+    return RespuestaJSON(contenido, headers=encabezados)
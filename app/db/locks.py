@@ -0,0 +1,59 @@
+#BLOQUEOS POR EMPLEADO Y DÍA
+# Serializa las reservas que compiten por la agenda de un mismo empleado en un mismo día.
+# En PostgreSQL usa un advisory lock de transacción (se libera solo en commit/rollback);
+# en otros motores (SQLite en desarrollo/pruebas) cae a un lock del proceso.
+
+import asyncio
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+# Locks locales repartidos en franjas para no crecer sin límite
+_FRANJAS = 256
+_locks_locales = [threading.Lock() for _ in range(_FRANJAS)]
+_ESPERA_MAXIMA = 0.01
+
+
+def _tomar_lock_local(lock: threading.Lock):
+    if not in_greenlet():
+        lock.acquire()
+        return
+    # DB_ASYNC: el handler corre dentro de run_sync, en el hilo del event loop. Bloquear
+    # el hilo congelaría también al request que tiene el lock; se cede el loop entre intentos.
+    espera = 0.0005
+    while not lock.acquire(blocking=False):
+        await_only(asyncio.sleep(espera))
+        espera = min(espera * 2, _ESPERA_MAXIMA)
+
+
+@contextmanager
+def bloqueo_empleados_dias(db: Session, claves):
+    """Bloquea varios (empleado_id, dia) a la vez, siempre en el mismo orden para que dos
+    transacciones que piden claves en común no se bloqueen mutuamente.
+    Usar envolviendo toda la transacción, incluido el commit."""
+    claves = sorted(set(claves))
+    if db.get_bind().dialect.name == "postgresql":
+        for empleado_id, dia in claves:
+            db.execute(
+                text("SELECT pg_advisory_xact_lock(:empleado_id, :dia)"),
+                {"empleado_id": empleado_id, "dia": dia.toordinal()}
+            )
+        yield
+    else:
+        # La conexión se toma antes del lock: si no, quien tiene el lock puede quedar
+        # esperando al pool mientras los que esperan el lock retienen todas las conexiones.
+        db.connection()
+        franjas = sorted({hash(clave) % _FRANJAS for clave in claves})
+        with ExitStack() as pila:
+            for franja in franjas:
+                lock = _locks_locales[franja]
+                _tomar_lock_local(lock)
+                pila.callback(lock.release)
+            yield
+
+
+def bloqueo_empleado_dia(db: Session, empleado_id: int, dia: date):
+    return bloqueo_empleados_dias(db, [(empleado_id, dia)])
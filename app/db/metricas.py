@@ -0,0 +1,194 @@
+#MÉTRICAS DE BASE DE DATOS
+# Espera para obtener una conexión del pool, conexiones en uso y consultas por request.
+# El conteo por request usa un contextvar que el middleware de app/main.py inicializa;
+# fuera de un request (scripts, tareas) las consultas se cuentan solo en el total.
+#
+# Por request se registra cantidad de sentencias, tiempo total en la DB y sentencias
+# repetidas con el mismo SQL (el patrón típico de un N+1). Con DB_DEBUG=1 se devuelven
+# en headers X-DB-*; DB_PRESUPUESTO_CONSULTAS fija un máximo por request que se loguea
+# y, con DB_PRESUPUESTO_ESTRICTO=1, se loguea como error y se marca en el header
+# X-DB-Presupuesto-Excedido (la respuesta no cambia: el handler ya hizo commit). Las
+# pruebas fijan presupuestos por endpoint con contar_consultas (tests/test_consultas.py).
+
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+DB_DEBUG = os.getenv("DB_DEBUG", "0").lower() in ("1", "true", "si")
+DB_PRESUPUESTO_CONSULTAS = int(os.getenv("DB_PRESUPUESTO_CONSULTAS", 0))  # 0 = sin límite
+DB_PRESUPUESTO_ESTRICTO = os.getenv("DB_PRESUPUESTO_ESTRICTO", "0").lower() in ("1", "true", "si")
+# A partir de cuántas ejecuciones del mismo SQL en un request se considera N+1
+DB_UMBRAL_REPETIDAS = int(os.getenv("DB_UMBRAL_REPETIDAS", 3))
+
+
+class PresupuestoExcedido(Exception):
+    pass
+
+
+class ConsultasRequest:
+    __slots__ = ("cantidad", "tiempo", "sentencias")
+
+    def __init__(self):
+        self.cantidad = 0
+        self.tiempo = 0.0
+        self.sentencias = Counter()
+
+    def agregar(self, sql: str, segundos: float):
+        self.cantidad += 1
+        self.tiempo += segundos
+        self.sentencias[sql] += 1
+
+    def repetidas(self) -> list[tuple[str, int]]:
+        return [(sql, n) for sql, n in self.sentencias.most_common() if n >= DB_UMBRAL_REPETIDAS]
+
+
+consultas_request: ContextVar = ContextVar("consultas_request", default=None)
+
+
+class MetricasDB:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.esperas = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.consultas_total = 0
+        self.requests = 0
+        self.consultas_en_requests = 0
+        self.consultas_max_request = 0
+        self.rutas = {}
+        self.pools = []
+        self.observadores = []
+
+    def registrar_espera(self, segundos: float):
+        with self.lock:
+            self.esperas += 1
+            self.espera_total += segundos
+            if segundos > self.espera_max:
+                self.espera_max = segundos
+
+    def registrar_consulta(self, sql: str, segundos: float):
+        with self.lock:
+            self.consultas_total += 1
+            for observador in self.observadores:
+                observador.agregar(sql, segundos)
+        actual = consultas_request.get()
+        if actual is not None:
+            actual.agregar(sql, segundos)
+
+    def registrar_request(self, ruta: str, consultas: ConsultasRequest):
+        repetidas = consultas.repetidas()
+        with self.lock:
+            self.requests += 1
+            self.consultas_en_requests += consultas.cantidad
+            if consultas.cantidad > self.consultas_max_request:
+                self.consultas_max_request = consultas.cantidad
+            datos = self.rutas.setdefault(ruta, {
+                "requests": 0, "consultas": 0, "consultas_max": 0, "tiempo_db": 0.0,
+                "requests_con_repetidas": 0, "repetidas": Counter(), "sobre_presupuesto": 0,
+            })
+            datos["requests"] += 1
+            datos["consultas"] += consultas.cantidad
+            datos["consultas_max"] = max(datos["consultas_max"], consultas.cantidad)
+            datos["tiempo_db"] += consultas.tiempo
+            if repetidas:
+                datos["requests_con_repetidas"] += 1
+                for sql, _ in repetidas:
+                    datos["repetidas"][sql[:200]] += 1
+            if DB_PRESUPUESTO_CONSULTAS and consultas.cantidad > DB_PRESUPUESTO_CONSULTAS:
+                datos["sobre_presupuesto"] += 1
+
+    def estadisticas(self) -> dict:
+        with self.lock:
+            return {
+                "pools": [
+                    {
+                        "tamaño": pool.size(),
+                        "en_uso": pool.checkedout(),
+                        "libres": pool.checkedin(),
+                        "overflow": pool.overflow(),
+                    }
+                    for pool in self.pools
+                ],
+                "checkouts": self.esperas,
+                "espera_promedio_ms": round(self.espera_total / self.esperas * 1000, 3) if self.esperas else 0.0,
+                "espera_max_ms": round(self.espera_max * 1000, 3),
+                "consultas_total": self.consultas_total,
+                "requests": self.requests,
+                "consultas_por_request": round(self.consultas_en_requests / self.requests, 3) if self.requests else 0.0,
+                "consultas_max_request": self.consultas_max_request,
+                "rutas": {
+                    ruta: {
+                        "requests": datos["requests"],
+                        "consultas_por_request": round(datos["consultas"] / datos["requests"], 3),
+                        "consultas_max": datos["consultas_max"],
+                        "tiempo_db_promedio_ms": round(datos["tiempo_db"] / datos["requests"] * 1000, 3),
+                        "requests_con_repetidas": datos["requests_con_repetidas"],
+                        "sobre_presupuesto": datos["sobre_presupuesto"],
+                        "sql_repetidos": dict(datos["repetidas"].most_common(5)),
+                    }
+                    for ruta, datos in self.rutas.items()
+                },
+            }
+
+
+metricas_db = MetricasDB()
+
+
+@contextmanager
+def contar_consultas(presupuesto: int | None = None):
+    """Cuenta todas las consultas del proceso mientras dure el bloque (incluidas las de los
+    requests que atiende un TestClient en otro hilo); si se pasa un presupuesto y se excede,
+    falla. Para pruebas: `with contar_consultas(3): cliente.get(...)`."""
+    consultas = ConsultasRequest()
+    with metricas_db.lock:
+        metricas_db.observadores.append(consultas)
+    try:
+        yield consultas
+    finally:
+        with metricas_db.lock:
+            metricas_db.observadores.remove(consultas)
+    if presupuesto is not None and consultas.cantidad > presupuesto:
+        raise PresupuestoExcedido(
+            f"{consultas.cantidad} consultas (presupuesto {presupuesto}); repetidas: {consultas.repetidas()}"
+        )
+
+
+def _pool_medido(base):
+    class PoolMedido(base):
+        def _do_get(self):
+            inicio = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                metricas_db.registrar_espera(time.perf_counter() - inicio)
+
+    PoolMedido.__name__ = f"{base.__name__}Medido"
+    return PoolMedido
+
+
+QueuePoolMedido = _pool_medido(QueuePool)
+AsyncQueuePoolMedido = _pool_medido(AsyncAdaptedQueuePool)
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicios_consulta", []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info["inicios_consulta"].pop()
+    metricas_db.registrar_consulta(statement, time.perf_counter() - inicio)
+
+
+def instrumentar(engine):
+    """Cuenta y cronometra cada sentencia ejecutada y registra el pool para las estadísticas."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _antes_de_ejecutar)
+    event.listen(sync_engine, "after_cursor_execute", _despues_de_ejecutar)
+    if isinstance(sync_engine.pool, QueuePool):
+        metricas_db.pools.append(sync_engine.pool)
+    return engine
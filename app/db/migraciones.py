@@ -0,0 +1,260 @@
+#MIGRACIONES
+# Cambios de esquema versionados. Cada cambio (tabla, columna, índice, restricción) va
+# como una migración más al final de MIGRACIONES (nunca editar una ya publicada), con
+# su propio DDL: nunca a partir de los modelos, que describen solo el esquema actual.
+# Cada una se aplica una sola vez y queda registrada en la tabla `migraciones`.
+#
+# Uso:
+#   python -m app.db.migraciones            aplica las pendientes
+#   python -m app.db.migraciones explain    falla si una consulta caliente hace seq scan
+# tests/test_indices.py hace la misma verificación (verificar_planes) en cada corrida y
+# tests/test_migraciones.py actualiza bases detenidas en cada migración intermedia.
+
+import sys
+from datetime import datetime
+from sqlalchemy import (Column, Date, DateTime, Enum, Float, ForeignKey, Index, Integer, MetaData,
+                        String, Table, Time, inspect, text)
+from app.db.session import engine
+
+_metadata_migraciones = MetaData()
+tabla_migraciones = Table(
+    "migraciones", _metadata_migraciones,
+    Column("id", String, primary_key=True),
+    Column("aplicada", DateTime, nullable=False),
+)
+
+# Esquema congelado: las migraciones no leen los modelos, que siguen cambiando. Cada
+# tabla queda como estaba cuando la creó su migración; lo posterior lo agrega otra.
+_esquema = MetaData()
+_users = Table(
+    "users", _esquema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nombre", String, nullable=False),
+    Column("email", String, unique=True, nullable=False, index=True),
+    Column("hashed_password", String, nullable=False),
+    Column("rol", Enum("super_admin", "admin", "empleado", name="userrole"), nullable=False),
+    Column("negocio_id", Integer, ForeignKey("negocios.id"), nullable=True),
+)
+_negocios = Table(
+    "negocios", _esquema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nombre", String, nullable=False),
+    Column("alias", String, unique=True, nullable=False),
+    Column("direccion", String, nullable=False),
+    Column("provincia", String, nullable=False),
+    Column("dueño_id", Integer, ForeignKey("users.id")),
+)
+_servicios = Table(
+    "servicios", _esquema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nombre", String, nullable=False),
+    Column("descripcion", String),
+    Column("precio", Float, nullable=False),
+    Column("duracion", Integer, nullable=False),
+    Column("direccion", String),
+    Column("empleado_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("negocio_id", Integer, ForeignKey("negocios.id")),
+)
+_agendas = Table(
+    "agendas", _esquema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("dia", Date, nullable=False),
+    Column("hora_inicio", Time, nullable=False),
+    Column("hora_fin", Time, nullable=False),
+    Column("duracion_turno", Integer, nullable=False),
+    Column("empleado_id", Integer, ForeignKey("users.id")),
+)
+_clientes = Table(
+    "clientes", _esquema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nombre", String, nullable=True),
+    Column("email", String, nullable=True),
+    Column("telefono", String, nullable=True),
+)
+_turnos = Table(
+    "turnos", _esquema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("dia", Date, nullable=False),
+    Column("hora_inicio", Time, nullable=False),
+    Column("hora_fin", Time, nullable=False),
+    Column("cliente_nombre", String, nullable=False),
+    Column("cliente_email", String, nullable=True),
+    Column("cliente_telefono", String, nullable=True),
+    Column("metodo_pago", String, nullable=False),
+    Column("monto_pagado", Float, nullable=False),
+    Column("estado", String, nullable=False),
+    Column("servicio_id", Integer, ForeignKey("servicios.id")),
+    Column("empleado_id", Integer, ForeignKey("users.id")),
+    Column("cliente_id", Integer, ForeignKey("clientes.id")),
+)
+_slots = Table(
+    "slots", _esquema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("empleado_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("dia", Date, nullable=False),
+    Column("hora_inicio", Time, nullable=False),
+    Column("hora_fin", Time, nullable=False),
+    Column("estado", String, nullable=False),
+    Index("ix_slots_empleado_estado_dia_hora", "empleado_id", "estado", "dia", "hora_inicio"),
+    Index("ix_slots_empleado_dia_hora", "empleado_id", "dia", "hora_inicio"),
+)
+
+
+def _crear_indices(conn, *indices, unico: bool = False):
+    # DDL explícito: un Index(...) sobre columnas de _esquema quedaría pegado a la tabla
+    for nombre, tabla, columnas in indices:
+        conn.execute(text(
+            f"CREATE {'UNIQUE ' if unico else ''}INDEX IF NOT EXISTS {nombre} ON {tabla} ({', '.join(columnas)})"
+        ))
+
+
+def _columnas(conn, tabla: str) -> set[str]:
+    return {c["name"] for c in inspect(conn).get_columns(tabla)}
+
+
+def _base(conn):
+    # El esquema previo a las migraciones; en bases existentes no hace nada
+    _esquema.create_all(bind=conn, tables=[_users, _negocios, _servicios, _agendas, _clientes, _turnos])
+
+
+def _token_version(conn):
+    if "token_version" not in _columnas(conn, "users"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+
+
+def _turnos_sin_solapamiento(conn):
+    # Un empleado no puede tener dos turnos solapados (solo PostgreSQL)
+    if conn.dialect.name != "postgresql":
+        return
+    existe = conn.execute(text(
+        "SELECT 1 FROM pg_constraint WHERE conname = 'turnos_sin_solapamiento'"
+    )).first()
+    if not existe:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        conn.execute(text(
+            "ALTER TABLE turnos ADD CONSTRAINT turnos_sin_solapamiento "
+            "EXCLUDE USING gist (empleado_id WITH =, tsrange(dia + hora_inicio, dia + hora_fin) WITH &&)"
+        ))
+
+
+def _indices_consultas_frecuentes(conn):
+    _crear_indices(
+        conn,
+        ("ix_agendas_empleado_dia", "agendas", ("empleado_id", "dia")),
+        ("ix_turnos_empleado_dia_hora", "turnos", ("empleado_id", "dia", "hora_inicio")),
+        ("ix_servicios_negocio_id", "servicios", ("negocio_id",)),
+        ("ix_servicios_empleado_id", "servicios", ("empleado_id",)),
+        ("ix_clientes_email", "clientes", ("email",)),
+        ("ix_clientes_telefono", "clientes", ("telefono",)),
+        ("ix_users_negocio_rol", "users", ("negocio_id", "rol")),
+    )
+
+
+def _indice_turnos_paginados(conn):
+    _crear_indices(conn, ("ix_turnos_dia_hora_id", "turnos", ("dia", "hora_inicio", "id")))
+
+
+def _tabla_slots(conn):
+    _slots.create(bind=conn, checkfirst=True)
+
+
+def _clientes_normalizados(conn):
+    from sqlalchemy.orm import Session
+    from app.utils.clientes import fusionar_clientes_duplicados, normalizar_clientes
+    columnas = _columnas(conn, "clientes")
+    for columna in ("email_normalizado", "telefono_normalizado"):
+        if columna not in columnas:
+            conn.execute(text(f"ALTER TABLE clientes ADD COLUMN {columna} VARCHAR"))
+    # Antes de los índices únicos: fusionar los duplicados y completar las claves
+    db = Session(bind=conn)
+    fusionar_clientes_duplicados(db, normalizados=False)
+    normalizar_clientes(db)
+    db.flush()
+    _crear_indices(
+        conn,
+        ("ux_clientes_email_normalizado", "clientes", ("email_normalizado",)),
+        ("ux_clientes_telefono_normalizado", "clientes", ("telefono_normalizado",)),
+        unico=True,
+    )
+
+
+MIGRACIONES = [
+    ("0001_base", _base),
+    ("0002_users_token_version", _token_version),
+    ("0003_turnos_sin_solapamiento", _turnos_sin_solapamiento),
+    ("0004_indices_consultas_frecuentes", _indices_consultas_frecuentes),
+    ("0005_indice_turnos_paginados", _indice_turnos_paginados),
+    ("0006_tabla_slots", _tabla_slots),
+    ("0007_clientes_normalizados", _clientes_normalizados),
+]
+
+
+def aplicar_migraciones(bind=engine) -> list[str]:
+    aplicadas_ahora = []
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Varios workers arrancando a la vez: solo uno migra
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('migraciones'))"))
+        _metadata_migraciones.create_all(bind=conn)
+        ya_aplicadas = {fila[0] for fila in conn.execute(tabla_migraciones.select())}
+        for id_migracion, migrar in MIGRACIONES:
+            if id_migracion in ya_aplicadas:
+                continue
+            migrar(conn)
+            conn.execute(tabla_migraciones.insert().values(id=id_migracion, aplicada=datetime.utcnow()))
+            aplicadas_ahora.append(id_migracion)
+    return aplicadas_ahora
+
+
+# Consultas calientes: cada una debe resolverse con un índice
+CONSULTAS_CALIENTES = {
+    "agendas por empleado y día":
+        "SELECT * FROM agendas WHERE empleado_id = 1 AND dia >= '2030-01-01' AND dia < '2030-01-15'",
+    "turnos por empleado, día y hora":
+        "SELECT * FROM turnos WHERE empleado_id = 1 AND dia = '2030-01-01' AND hora_inicio < '12:00:00'",
+    "servicios por negocio":
+        "SELECT * FROM servicios WHERE negocio_id = 1",
+    "servicios por empleado":
+        "SELECT * FROM servicios WHERE empleado_id = 1",
+    "clientes por email":
+        "SELECT * FROM clientes WHERE email = 'cliente@ejemplo.com'",
+    "clientes por teléfono":
+        "SELECT * FROM clientes WHERE telefono = '+5491100000000'",
+    "clientes por email normalizado":
+        "SELECT * FROM clientes WHERE email_normalizado = 'cliente@ejemplo.com'",
+    "clientes por teléfono normalizado":
+        "SELECT * FROM clientes WHERE telefono_normalizado = '+5491100000000'",
+    "turnos paginados":
+        "SELECT * FROM turnos WHERE (dia, hora_inicio, id) > ('2030-01-01', '09:00:00', 10) "
+        "ORDER BY dia, hora_inicio, id LIMIT 51",
+    "empleados por negocio":
+        "SELECT * FROM users WHERE negocio_id = 1 AND rol = 'empleado'",
+}
+
+
+def _usa_seq_scan(conn, sql: str) -> bool:
+    if conn.dialect.name == "postgresql":
+        # Con tablas chicas el planner elige seq scan igual; desactivarlo muestra si
+        # existe un índice utilizable (si no lo hay, el plan sigue siendo Seq Scan).
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = conn.execute(text(f"EXPLAIN {sql}")).scalars().all()
+        return any("Seq Scan" in linea for linea in plan)
+    plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return any(fila[-1].startswith("SCAN") and "INDEX" not in fila[-1] for fila in plan)
+
+
+def verificar_planes(bind=engine) -> list[str]:
+    """Devuelve los nombres de las consultas calientes que no usan índice."""
+    # connect() sin commit: el SET LOCAL se descarta con el rollback al cerrar
+    with bind.connect() as conn:
+        return [nombre for nombre, sql in CONSULTAS_CALIENTES.items() if _usa_seq_scan(conn, sql)]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "explain":
+        sin_indice = verificar_planes()
+        for nombre in sin_indice:
+            print(f"SEQ SCAN: {nombre}")
+        sys.exit(1 if sin_indice else 0)
+    for id_migracion in aplicar_migraciones():
+        print(f"aplicada {id_migracion}")
@@ -2,14 +2,57 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from app.db.metricas import QueuePoolMedido, AsyncQueuePoolMedido, instrumentar
 import os
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Modo async (DB_ASYNC=1): los endpoints corren como corrutinas sobre AsyncSession
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "si")
+
+# Pool de conexiones (ajustar DB_POOL_SIZE + DB_MAX_OVERFLOW a la cantidad de workers)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "si")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+def url_async(url: str) -> str:
+    """postgresql:// -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://"""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+def crear_engine(url: str, asincronico: bool = False):
+    """Único lugar donde se crean motores: aplica la configuración del pool y la instrumentación."""
+    kwargs = {}
+    if not url.startswith("sqlite"):
+        kwargs.update(
+            poolclass=AsyncQueuePoolMedido if asincronico else QueuePoolMedido,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+        if DB_STATEMENT_TIMEOUT_MS and url.startswith("postgresql"):
+            if asincronico:
+                kwargs["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+            else:
+                kwargs["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+    if asincronico:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        return instrumentar(create_async_engine(url, **kwargs))
+    return instrumentar(create_engine(url, **kwargs))
+
 # Motor de conexión a PostgreSQL
-engine = create_engine(DATABASE_URL)
+engine = crear_engine(DATABASE_URL)
 
 # Sesión para interactuar con la DB
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -23,4 +66,20 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    async_engine = crear_engine(os.getenv("DATABASE_URL_ASYNC") or url_async(DATABASE_URL), asincronico=True)
+    # expire_on_commit=False: los objetos devueltos se serializan fuera de la sesión
+    AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession,
+                                     autocommit=False, autoflush=False, expire_on_commit=False)
+
+# Versión async de get_db, usada por los endpoints en modo DB_ASYNC
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
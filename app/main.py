@@ -1,17 +1,104 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.deps import get_current_user
-from fastapi import Depends
+from app.core.deps import get_current_user, get_current_user_async, get_usuario_token, get_usuario_token_async
+from app.db.session import DB_ASYNC
+from app.db.metricas import (
+    ConsultasRequest, consultas_request, metricas_db,
+    DB_DEBUG, DB_PRESUPUESTO_CONSULTAS, DB_PRESUPUESTO_ESTRICTO,
+)
+from fastapi import Depends, Request
+from fastapi.responses import PlainTextResponse
+from app.core.metricas import exponer_metricas, medir_request, requests_en_curso
+from app.core.logs import configurar_logging, contexto_log
+import logging
+import time
+import uuid
+
+configurar_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# Consultas SQL por request (ver app/db/metricas.py)
+@app.middleware("http")
+async def contar_consultas(request: Request, call_next):
+    consultas = ConsultasRequest()
+    token = consultas_request.set(consultas)
+    try:
+        response = await call_next(request)
+    finally:
+        consultas_request.reset(token)
+    # Se agrupa por la plantilla de la ruta (/turnos/{turno_id}), no por la URL concreta
+    ruta = request.scope.get("route")
+    ruta = f"{request.method} {ruta.path}" if ruta is not None else "sin_ruta"
+    metricas_db.registrar_request(ruta, consultas)
+
+    repetidas = consultas.repetidas()
+    if DB_DEBUG:
+        response.headers["X-DB-Consultas"] = str(consultas.cantidad)
+        response.headers["X-DB-Tiempo-Ms"] = f"{consultas.tiempo * 1000:.3f}"
+        response.headers["X-DB-Repetidas"] = str(sum(n for _, n in repetidas))
+    if DB_PRESUPUESTO_CONSULTAS and consultas.cantidad > DB_PRESUPUESTO_CONSULTAS:
+        # Nunca se reemplaza la respuesta: el handler ya confirmó su transacción y un 500
+        # haría que el cliente reintente algo que sí se hizo (una reserva, por ejemplo)
+        logger.log(
+            logging.ERROR if DB_PRESUPUESTO_ESTRICTO else logging.WARNING,
+            "%s ejecutó %s consultas (presupuesto %s); repetidas: %s",
+            ruta, consultas.cantidad, DB_PRESUPUESTO_CONSULTAS, [(sql[:120], n) for sql, n in repetidas],
+        )
+        if DB_PRESUPUESTO_ESTRICTO:
+            response.headers["X-DB-Presupuesto-Excedido"] = f"{consultas.cantidad}/{DB_PRESUPUESTO_CONSULTAS}"
+    return response
+
+# Latencia, estado y requests en curso por ruta (ver app/core/metricas.py), y una línea
+# de log por request con su id (ver app/core/logs.py)
+@app.middleware("http")
+async def medir_requests(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    contexto = {"request_id": request_id}
+    token = contexto_log.set(contexto)
+    requests_en_curso.inc()
+    inicio = time.perf_counter()
+    estado = 500
+    try:
+        response = await call_next(request)
+        estado = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    except Exception:
+        logger.exception("error no manejado")
+        raise
+    finally:
+        duracion = time.perf_counter() - inicio
+        requests_en_curso.dec()
+        ruta = request.scope.get("route")
+        ruta = ruta.path if ruta is not None else "sin_ruta"
+        medir_request(request.method, ruta, estado, duracion)
+        contexto["ruta"] = ruta
+        logger.info("request", extra={
+            "metodo": request.method, "estado": estado, "duracion_ms": round(duracion * 1000, 3),
+        })
+        contexto_log.reset(token)
+
+@app.get("/metrics", include_in_schema=False)
+def metricas():
+    return PlainTextResponse(exponer_metricas(), media_type="text/plain; version=0.0.4")
+
+# En modo async el usuario actual se busca con la AsyncSession del request
+if DB_ASYNC:
+    app.dependency_overrides[get_current_user] = get_current_user_async
+    app.dependency_overrides[get_usuario_token] = get_usuario_token_async
+
 # Middleware CORS para desarrollo
+from app.utils.paginacion import HEADER_CURSOR
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Sin esto el navegador no deja leer estos headers desde otro origen (cursor de paginación)
+    expose_headers=[HEADER_CURSOR, "ETag", "X-Request-ID"],
 )
 
 # Ruta protegida
@@ -19,11 +106,11 @@ app.add_middleware(
 def ruta_protegida(usuario=Depends(get_current_user)):
     return {"mensaje": f"Hola {usuario.nombre}, accediste con tu token."}
 
-#CREAR TABLAS
-from app.db.session import Base, engine
+#CREAR TABLAS Y APLICAR MIGRACIONES PENDIENTES
+from app.db.migraciones import aplicar_migraciones
 from app import models 
 
-Base.metadata.create_all(bind=engine)
+aplicar_migraciones()
 
 from app.api import auth
 app.include_router(auth.router)
@@ -42,3 +129,7 @@ app.include_router(empleados.router)
 from app.api.publico import router_publico
 app.include_router(router_publico)
 
+#Eventos de disponibilidad (SSE / WebSocket)
+from app.api import eventos
+app.include_router(eventos.router)
+
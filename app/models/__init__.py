@@ -3,4 +3,5 @@ from .cliente import Cliente
 from .negocio import Negocio
 from .servicio import Servicio
 from .turno import Turno
-from .agenda import Agenda
\ No newline at end of file
+from .agenda import Agenda
+from .slot import Slot
\ No newline at end of file
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Time, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Time, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
 class Agenda(Base):
     __tablename__ = "agendas"
+    __table_args__ = (
+        Index("ix_agendas_empleado_dia", "empleado_id", "dia"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     dia = Column(Date, nullable=False) 
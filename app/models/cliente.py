@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from app.db.session import Base
 
 class Cliente(Base):
     __tablename__ = "clientes"
+    # Claves de deduplicación (ver app/utils/clientes.py): un cliente por email y por
+    # teléfono normalizados. Los NULL no chocan entre sí.
+    __table_args__ = (
+        Index("ux_clientes_email_normalizado", "email_normalizado", unique=True),
+        Index("ux_clientes_telefono_normalizado", "telefono_normalizado", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String, nullable=True)
-    email = Column(String, nullable=True, unique=False)
-    telefono = Column(String, nullable=True, unique=False)
+    email = Column(String, nullable=True, unique=False, index=True)
+    telefono = Column(String, nullable=True, unique=False, index=True)
+    email_normalizado = Column(String, nullable=True)
+    telefono_normalizado = Column(String, nullable=True)
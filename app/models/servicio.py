@@ -12,8 +12,8 @@ class Servicio(Base):
     duracion = Column(Integer, nullable=False)
     direccion = Column(String)  # 👈 agregá esta línea
 
-    empleado_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    negocio_id = Column(Integer, ForeignKey("negocios.id"))
+    empleado_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    negocio_id = Column(Integer, ForeignKey("negocios.id"), index=True)
 
     empleado = relationship("User", back_populates="servicios", foreign_keys=[empleado_id])
     negocio = relationship("Negocio", back_populates="servicios", foreign_keys=[negocio_id])
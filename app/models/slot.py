@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Time, Date, ForeignKey, Index
+from app.db.session import Base
+
+class Slot(Base):
+    # Tabla materializada de horarios (ver app/utils/slots.py), opcional con SLOTS_MATERIALIZADOS=1
+    __tablename__ = "slots"
+    __table_args__ = (
+        Index("ix_slots_empleado_estado_dia_hora", "empleado_id", "estado", "dia", "hora_inicio"),  # lecturas
+        Index("ix_slots_empleado_dia_hora", "empleado_id", "dia", "hora_inicio"),  # actualizaciones
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    empleado_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    dia = Column(Date, nullable=False)
+    hora_inicio = Column(Time, nullable=False)
+    hora_fin = Column(Time, nullable=False)
+    estado = Column(String, nullable=False, default="libre")  # libre | ocupado
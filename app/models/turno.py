@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Time, Date, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Time, Date, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 from app.models.cliente import Cliente
 
 class Turno(Base):
     __tablename__ = "turnos"
+    __table_args__ = (
+        Index("ix_turnos_empleado_dia_hora", "empleado_id", "dia", "hora_inicio"),
+        Index("ix_turnos_dia_hora_id", "dia", "hora_inicio", "id"),  # listados paginados
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     dia = Column(Date, nullable=False)  # Solo fecha
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 import enum
@@ -10,6 +10,9 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_negocio_rol", "negocio_id", "rol"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String, nullable=False)
@@ -17,6 +20,7 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     rol = Column(Enum(UserRole), nullable=False)
     negocio_id = Column(Integer, ForeignKey("negocios.id"), nullable=True)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # claim "ver" del JWT
 
     negocio = relationship("Negocio", back_populates="usuarios", foreign_keys=[negocio_id])
     servicios = relationship("Servicio", back_populates="empleado", foreign_keys="Servicio.empleado_id")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import date, time
 
 class ShowAgenda(BaseModel):
@@ -8,12 +8,11 @@ class ShowAgenda(BaseModel):
     hora_fin: time
     duracion_turno: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AgendaCreateEmpleado(BaseModel):
     dia: date
     hora_inicio: time
     hora_fin: time
-    duracion_turno: int
\ No newline at end of file
+    duracion_turno: int = Field(gt=0)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ConfigDict
 from typing import Optional
 
 class ClienteCreate(BaseModel):
@@ -12,5 +12,4 @@ class ClienteOut(BaseModel):
     email: Optional[str] = None
     telefono: Optional[str] = None
 
-class Config:
-    from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from typing import Optional
 from enum import Enum
-from datetime import datetime, time
+from datetime import date, datetime, time
 
 class EmpleadoCreate(BaseModel):
     nombre: str
@@ -13,19 +13,32 @@ class EmpleadoOut(BaseModel):
     nombre: str
     email: EmailStr
 
-    class Config:
-        form_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class EmpleadoListado(EmpleadoOut):
+    rol: str
+    negocio_id: Optional[int] = None
         
 class EmpleadoUpdate(BaseModel):
-    nombre: Optional[str]
-    email: Optional[str]
-    password: Optional[str]
+    nombre: Optional[str] = None
+    email: Optional[str] = None
+    password: Optional[str] = None
 
 class AgendaCreateEmpleado(BaseModel):
-    dia: str
+    dia: date
+    hora_inicio: time
+    hora_fin: time
+    duracion_turno: int = Field(gt=0)  # en minutos
+
+class AgendaRecurrenteEmpleado(BaseModel):
+    # Ej.: lunes a viernes 09:00-18:00, turnos de 30 min, 12 semanas, salvo feriados
+    dias_semana: list[int] = Field(min_length=1)  # 0 = lunes ... 6 = domingo
     hora_inicio: time
     hora_fin: time
-    duracion_turno: int  # en minutos
+    duracion_turno: int = Field(gt=0)  # en minutos
+    desde: date
+    semanas: int = Field(ge=1, le=52)
+    excepciones: list[date] = []
 
 class ServicioEmpleado(BaseModel):
     nombre: str
@@ -1,6 +1,6 @@
 #crear negocio y admin
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ConfigDict
 
 class NegocioCreate(BaseModel):
     nombre: str
@@ -15,4 +15,34 @@ class NegocioUpdate(BaseModel):
     nombre: str | None = None
     alias: str | None = None
     direccion: str | None = None
-    provincia: str | None = None
\ No newline at end of file
+    provincia: str | None = None
+
+# Vista general para el superadmin: todo se arma desde relaciones ya cargadas
+# (selectinload), así la serialización no dispara consultas.
+
+class UsuarioResumen(BaseModel):
+    id: int
+    nombre: str
+    email: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ServicioResumen(BaseModel):
+    id: int
+    nombre: str
+    descripcion: str | None = None
+    precio: float
+    duracion: int
+    empleado_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class NegocioOverview(BaseModel):
+    id: int
+    nombre: str
+    alias: str
+    direccion: str
+    provincia: str
+    admin: UsuarioResumen | None = None
+    empleados: list[UsuarioResumen] = []
+    servicios: list[ServicioResumen] = []
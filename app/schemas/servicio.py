@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 class ServicioBase(BaseModel):
@@ -27,8 +27,7 @@ class ShowServicio(ServicioBase):
     duracion: int  # 👈 si lo querés mostrar
     empleado_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ServicioOut(BaseModel):
     id: int
@@ -40,8 +39,7 @@ class ServicioOut(BaseModel):
     negocio_id: int
     empleado_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
         
 class ServicioCreateAdmin(BaseModel):
     nombre: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from datetime import date, time
 from typing import Optional
 
@@ -28,5 +28,24 @@ class ShowTurno(TurnoBase):
     servicio_id: int
     empleado_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class TurnoDetalle(ShowTurno):
+    # Listado del superadmin: incluye el cliente vinculado
+    cliente_id: Optional[int] = None
+
+class ReservaItem(BaseModel):
+    servicio_id: int
+    empleado_id: int
+    dia: date
+    hora_inicio: time
+    monto_pagado: float = 0
+
+class ReservaBatch(BaseModel):
+    # Varios servicios para un mismo cliente, reservados todos o ninguno
+    cliente_nombre: str
+    cliente_email: Optional[EmailStr] = None
+    cliente_telefono: Optional[str] = None
+    metodo_pago: str
+    estado: str
+    turnos: list[ReservaItem] = Field(min_length=1, max_length=20)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ConfigDict
 from typing import Optional
 from enum import Enum
 
@@ -24,5 +24,4 @@ class ShowUser(BaseModel):
     email: EmailStr
     rol: UserRole
 
-    class Config:
-        form_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
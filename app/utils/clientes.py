@@ -0,0 +1,205 @@
+#CLIENTES: NORMALIZACIÓN, UPSERT Y FUSIÓN DE DUPLICADOS
+# Un cliente se identifica por su email en minúsculas o por su teléfono en formato E.164
+# (+54351..., CLIENTES_CODIGO_PAIS para números sin prefijo internacional). Ambas claves
+# tienen índice único, así que la búsqueda y el alta son un solo INSERT ... ON CONFLICT
+# en PostgreSQL; en otros motores (SQLite) se busca y después se inserta.
+#
+# Los duplicados que ya existían se fusionan al migrar (0007). Para datos cargados por
+# fuera de la API (importaciones), normalizar y fusionar con (a mano o desde cron; la API
+# ya no puede generar duplicados por los índices únicos):
+#   python -m app.utils.clientes fusionar
+
+import os
+import re
+import sys
+from sqlalchemy import case, or_, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.cliente import Cliente
+from app.models.turno import Turno
+
+CLIENTES_CODIGO_PAIS = os.getenv("CLIENTES_CODIGO_PAIS", "54")
+
+def normalizar_email(email: str | None) -> str | None:
+    email = (email or "").strip().lower()
+    return email or None
+
+def normalizar_telefono(telefono: str | None) -> str | None:
+    if not telefono:
+        return None
+    telefono = telefono.strip()
+    digitos = re.sub(r"\D", "", telefono)
+    if telefono.startswith("00"):
+        digitos = digitos[2:]
+    elif not telefono.startswith("+"):
+        digitos = CLIENTES_CODIGO_PAIS + digitos.lstrip("0")
+    return "+" + digitos if len(digitos) >= 8 else None
+
+_UPSERT_POSTGRES = text("""
+    WITH existente AS (
+        SELECT id FROM clientes
+        WHERE email_normalizado = :email_normalizado OR telefono_normalizado = :telefono_normalizado
+        ORDER BY (email_normalizado = :email_normalizado) DESC NULLS LAST, id
+        LIMIT 1
+    ), insertado AS (
+        INSERT INTO clientes (nombre, email, telefono, email_normalizado, telefono_normalizado)
+        SELECT CAST(:nombre AS VARCHAR), CAST(:email AS VARCHAR), CAST(:telefono AS VARCHAR),
+               CAST(:email_normalizado AS VARCHAR), CAST(:telefono_normalizado AS VARCHAR)
+        WHERE NOT EXISTS (SELECT 1 FROM existente)
+        ON CONFLICT DO NOTHING
+        RETURNING id
+    )
+    SELECT id FROM existente UNION ALL SELECT id FROM insertado
+""")
+
+def _buscar(db: Session, email_normalizado: str | None, telefono_normalizado: str | None) -> int | None:
+    # Con `== None` SQLAlchemy compara IS NULL: solo se filtra por las claves presentes
+    condiciones = []
+    if email_normalizado is not None:
+        condiciones.append(Cliente.email_normalizado == email_normalizado)
+    if telefono_normalizado is not None:
+        condiciones.append(Cliente.telefono_normalizado == telefono_normalizado)
+    # Primero el que coincide por email, como antes
+    fila = db.query(Cliente.id).filter(or_(*condiciones)).order_by(
+        case((condiciones[0], 0), else_=1), Cliente.id
+    ).first()
+    return fila[0] if fila else None
+
+def obtener_o_crear_cliente(db: Session, nombre: str, email: str | None, telefono: str | None) -> int:
+    """Id del cliente con ese email o teléfono; si no existe, lo crea."""
+    parametros = {
+        "nombre": nombre, "email": email, "telefono": telefono,
+        "email_normalizado": normalizar_email(email), "telefono_normalizado": normalizar_telefono(telefono),
+    }
+    if parametros["email_normalizado"] is None and parametros["telefono_normalizado"] is None:
+        cliente = Cliente(**parametros)
+        db.add(cliente)
+        db.flush()
+        return cliente.id
+
+    if db.get_bind().dialect.name == "postgresql":
+        cliente_id = db.execute(_UPSERT_POSTGRES, parametros).scalar()
+        if cliente_id is not None:
+            return cliente_id
+        # Otra transacción lo insertó entre medio (ON CONFLICT DO NOTHING): ya es visible
+        return _buscar(db, parametros["email_normalizado"], parametros["telefono_normalizado"])
+
+    cliente_id = _buscar(db, parametros["email_normalizado"], parametros["telefono_normalizado"])
+    if cliente_id is not None:
+        return cliente_id
+    # El lock de la reserva es por (empleado, día): dos reservas del mismo cliente nuevo con
+    # distintos empleados pueden llegar juntas al alta. La segunda choca con el índice único
+    # y se queda con el cliente que insertó la primera.
+    if db.get_bind().dialect.name == "sqlite":
+        # pysqlite no respeta los SAVEPOINT (el RELEASE confirma toda la transacción)
+        cliente_id = db.execute(
+            sqlite_insert(Cliente).values(**parametros).on_conflict_do_nothing().returning(Cliente.id)
+        ).scalar()
+    else:
+        try:
+            with db.begin_nested():
+                cliente = Cliente(**parametros)
+                db.add(cliente)
+            cliente_id = cliente.id
+        except IntegrityError:
+            cliente_id = None
+    if cliente_id is None:
+        cliente_id = _buscar(db, parametros["email_normalizado"], parametros["telefono_normalizado"])
+    return cliente_id
+
+#FUSIÓN DE DUPLICADOS
+
+def _grupos_duplicados(filas):
+    """Agrupa (id, email_normalizado, telefono_normalizado) conectados por alguna clave
+    compartida (union-find). Devuelve solo los grupos de más de un cliente."""
+    padre = {}
+
+    def raiz(id):
+        while padre[id] != id:
+            padre[id] = padre[padre[id]]
+            id = padre[id]
+        return id
+
+    primero_por_clave = {}
+    for id, email, telefono in filas:
+        padre[id] = id
+        for clave in (("email", email), ("telefono", telefono)):
+            if clave[1] is None:
+                continue
+            if clave in primero_por_clave:
+                a, b = raiz(primero_por_clave[clave]), raiz(id)
+                padre[max(a, b)] = min(a, b)
+            else:
+                primero_por_clave[clave] = id
+
+    grupos = {}
+    for id in padre:
+        grupos.setdefault(raiz(id), []).append(id)
+    return [sorted(ids) for ids in grupos.values() if len(ids) > 1]
+
+def normalizar_clientes(db: Session, lote: int = 1000) -> int:
+    """Completa las claves normalizadas que falten (clientes anteriores a las columnas)."""
+    actualizados = 0
+    ultimo_id = 0
+    while True:
+        clientes = db.query(Cliente).filter(
+            Cliente.id > ultimo_id,
+            or_(
+                Cliente.email.isnot(None) & Cliente.email_normalizado.is_(None),
+                Cliente.telefono.isnot(None) & Cliente.telefono_normalizado.is_(None),
+            ),
+        ).order_by(Cliente.id).limit(lote).all()
+        if not clientes:
+            return actualizados
+        for cliente in clientes:
+            cliente.email_normalizado = normalizar_email(cliente.email)
+            cliente.telefono_normalizado = normalizar_telefono(cliente.telefono)
+            actualizados += 1
+        ultimo_id = clientes[-1].id
+        db.flush()
+
+def fusionar_clientes_duplicados(db: Session, normalizados: bool = True) -> int:
+    """Deja un cliente por grupo de duplicados (el de menor id), le pasa los turnos de los
+    demás, completa email/teléfono faltantes y borra el resto. Devuelve cuántos borró.
+    Con normalizados=False calcula las claves en memoria (antes de que existan las columnas)."""
+    if normalizados:
+        filas = db.query(Cliente.id, Cliente.email_normalizado, Cliente.telefono_normalizado).filter(
+            or_(Cliente.email_normalizado.isnot(None), Cliente.telefono_normalizado.isnot(None))
+        ).all()
+    else:
+        filas = [(id, normalizar_email(email), normalizar_telefono(telefono))
+                 for id, email, telefono in db.execute(text("SELECT id, email, telefono FROM clientes"))]
+
+    borrados = 0
+    for ids in _grupos_duplicados(filas):
+        conservado, duplicados = ids[0], ids[1:]
+        db.query(Turno).filter(Turno.cliente_id.in_(duplicados)).update(
+            {Turno.cliente_id: conservado}, synchronize_session=False
+        )
+        datos = db.query(Cliente.nombre, Cliente.email, Cliente.telefono).filter(Cliente.id.in_(ids)).order_by(Cliente.id).all()
+        nombre = next((d.nombre for d in datos if d.nombre), None)
+        email = next((d.email for d in datos if d.email), None)
+        telefono = next((d.telefono for d in datos if d.telefono), None)
+        # Borrar antes de completar: las claves del conservado chocarían con las de los duplicados
+        db.query(Cliente).filter(Cliente.id.in_(duplicados)).delete(synchronize_session=False)
+        valores = {Cliente.nombre: nombre, Cliente.email: email, Cliente.telefono: telefono}
+        if normalizados:
+            valores[Cliente.email_normalizado] = normalizar_email(email)
+            valores[Cliente.telefono_normalizado] = normalizar_telefono(telefono)
+        db.query(Cliente).filter(Cliente.id == conservado).update(valores, synchronize_session=False)
+        borrados += len(duplicados)
+    return borrados
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["fusionar"]:
+        from app.db.session import SessionLocal
+        from app import models
+        db = SessionLocal()
+        try:
+            normalizar_clientes(db)
+            print(f"clientes fusionados: {fusionar_clientes_duplicados(db)}")
+            db.commit()
+        finally:
+            db.close()
@@ -0,0 +1,171 @@
+#MOTOR DE DISPONIBILIDAD
+# Calcula los horarios libres a partir de agendas y turnos cargados en bloque:
+# una consulta para agendas y otra para turnos en todo el horizonte, y luego
+# se recorren los huecos de un IndiceIntervalos (O(n log n)) en vez de un any() por slot.
+
+import threading
+from collections import defaultdict
+from datetime import date, time, timedelta
+from sqlalchemy.orm import Session
+from app.core.cache import cache_desde_entorno
+from app.utils.intervalos import IndiceIntervalos
+from app.utils.versiones import cambio_empleado
+from app.models.agenda import Agenda
+from app.models.turno import Turno
+
+DIAS_POR_DEFECTO = 14
+
+# Slots libres ya calculados por (empleado_id, dia, duracion, paso). Cada entrada guarda
+# la versión de (empleado_id, dia) con la que se calculó; invalidar sube la versión y
+# las entradas viejas dejan de servirse aunque no hayan vencido.
+cache_disponibilidad = cache_desde_entorno("disponibilidad", "DISPONIBILIDAD_CACHE", ttl=60, max_entradas=20000)
+_versiones = {}
+_versiones_lock = threading.Lock()
+
+
+def version_dia(empleado_id: int, dia: date) -> int:
+    return _versiones.get((empleado_id, dia), 0)
+
+
+def invalidar_disponibilidad(empleado_id: int, *dias: date):
+    """Llamar después de cualquier escritura de agenda o turno que afecte a ese empleado y día."""
+    if empleado_id is not None:
+        cambio_empleado(empleado_id)
+    with _versiones_lock:
+        for dia in dias:
+            if empleado_id is None or dia is None:
+                continue
+            if isinstance(dia, str):
+                dia = date.fromisoformat(dia)
+            _versiones[(empleado_id, dia)] = _versiones.get((empleado_id, dia), 0) + 1
+
+
+def a_minutos(hora: time) -> int:
+    return hora.hour * 60 + hora.minute
+
+
+def formatear_minutos(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def cargar_agendas_y_turnos(db: Session, empleado_ids, desde: date, hasta: date):
+    """Trae en dos consultas todas las agendas y turnos de los empleados en [desde, hasta)
+    y los agrupa por (empleado_id, dia)."""
+    agendas = db.query(
+        Agenda.empleado_id, Agenda.dia, Agenda.hora_inicio, Agenda.hora_fin, Agenda.duracion_turno
+    ).filter(
+        Agenda.empleado_id.in_(empleado_ids),
+        Agenda.dia >= desde,
+        Agenda.dia < hasta
+    ).all()
+
+    turnos = db.query(
+        Turno.empleado_id, Turno.dia, Turno.hora_inicio, Turno.hora_fin
+    ).filter(
+        Turno.empleado_id.in_(empleado_ids),
+        Turno.dia >= desde,
+        Turno.dia < hasta
+    ).all()
+
+    agendas_por_dia = defaultdict(list)
+    for empleado_id, dia, hora_inicio, hora_fin, duracion_turno in agendas:
+        agendas_por_dia[(empleado_id, dia)].append(
+            (a_minutos(hora_inicio), a_minutos(hora_fin), duracion_turno)
+        )
+
+    ocupados_por_dia = defaultdict(list)
+    for empleado_id, dia, hora_inicio, hora_fin in turnos:
+        ocupados_por_dia[(empleado_id, dia)].append((a_minutos(hora_inicio), a_minutos(hora_fin)))
+
+    return agendas_por_dia, ocupados_por_dia
+
+
+def calcular_dia(agendas_dia, ocupados_dia, paso: int | None = None, duracion: int | None = None) -> list[int]:
+    """Slots libres de un empleado en un día, en minutos, ordenados."""
+    ocupados = IndiceIntervalos(ocupados_dia)
+    libres = []
+    for inicio, fin, duracion_turno in sorted(agendas_dia):
+        dur = duracion or duracion_turno
+        libres.extend(ocupados.slots_libres(inicio, fin, dur, paso or dur))
+    return libres
+
+
+def disponibilidad_empleados(db: Session, empleado_ids, desde: date,
+                             dias: int = DIAS_POR_DEFECTO, paso: int | None = None,
+                             duraciones: dict | None = None) -> dict:
+    """Calcula en una sola pasada los slots libres de varios empleados.
+    Devuelve {empleado_id: [(dia, [minutos, ...]), ...]} solo con los días que tienen lugar.
+    `duraciones` permite fijar la duración del slot por empleado (p. ej. la del servicio).
+    Los días ya calculados salen de la cache; solo se consulta la DB por los empleados
+    a los que les falta algún día."""
+    duraciones = duraciones or {}
+    rango = [desde + timedelta(days=i) for i in range(dias)]
+
+    calculados = {}
+    faltantes = []
+    for empleado_id in empleado_ids:
+        duracion = duraciones.get(empleado_id)
+        for dia in rango:
+            libres = cache_disponibilidad.get((empleado_id, dia, duracion, paso), version_dia(empleado_id, dia))
+            if libres is None:
+                faltantes.append(empleado_id)
+                break
+            calculados[(empleado_id, dia)] = libres
+
+    if faltantes:
+        # Versiones tomadas antes de leer: si algo se escribe mientras calculamos,
+        # lo que guardemos queda marcado como viejo.
+        versiones = {(e, dia): version_dia(e, dia) for e in faltantes for dia in rango}
+        agendas_por_dia, ocupados_por_dia = cargar_agendas_y_turnos(db, faltantes, desde, rango[-1] + timedelta(days=1))
+        for empleado_id in faltantes:
+            duracion = duraciones.get(empleado_id)
+            for dia in rango:
+                libres = calcular_dia(
+                    agendas_por_dia.get((empleado_id, dia), []),
+                    ocupados_por_dia.get((empleado_id, dia), []),
+                    paso, duracion
+                )
+                calculados[(empleado_id, dia)] = libres
+                cache_disponibilidad.set((empleado_id, dia, duracion, paso), libres, versiones[(empleado_id, dia)])
+
+    resultado = {empleado_id: [] for empleado_id in empleado_ids}
+    for empleado_id in empleado_ids:
+        for dia in rango:
+            libres = calculados[(empleado_id, dia)]
+            if libres:
+                resultado[empleado_id].append((dia, libres))
+    return resultado
+
+
+def formatear_dias(dias_libres) -> list[dict]:
+    return [
+        {"fecha": dia.isoformat(), "horarios": [formatear_minutos(m) for m in libres]}
+        for dia, libres in dias_libres
+    ]
+
+
+def fusionar_empleados(por_empleado: dict) -> list[dict]:
+    """Vista combinada: por día y horario, qué empleados están libres."""
+    combinado = defaultdict(lambda: defaultdict(list))
+    for empleado_id, dias_libres in por_empleado.items():
+        for dia, libres in dias_libres:
+            for minuto in libres:
+                combinado[dia][minuto].append(empleado_id)
+    return [
+        {
+            "fecha": dia.isoformat(),
+            "horarios": [
+                {"hora": formatear_minutos(minuto), "empleados": sorted(empleados)}
+                for minuto, empleados in sorted(combinado[dia].items())
+            ]
+        }
+        for dia in sorted(combinado)
+    ]
+
+
+def disponibilidad_empleado(db: Session, empleado_id: int, desde: date,
+                            dias: int = DIAS_POR_DEFECTO, paso: int | None = None,
+                            duracion: int | None = None) -> list[dict]:
+    duraciones = {empleado_id: duracion} if duracion else None
+    por_empleado = disponibilidad_empleados(db, [empleado_id], desde, dias, paso, duraciones)
+    return formatear_dias(por_empleado[empleado_id])
@@ -0,0 +1,124 @@
+#EVENTOS DE DISPONIBILIDAD (PUB/SUB EN PROCESO)
+# Las páginas de reserva se suscriben a un empleado o a un negocio (por SSE o WebSocket,
+# ver app/api/eventos.py) y reciben los cambios de horarios en vez de volver a pedir la
+# disponibilidad: "ocupado" cuando se toma un horario, "liberado" cuando se libera o se
+# abre una agenda nueva.
+#
+# Cada suscriptor es una asyncio.Queue acotada del event loop del worker: un suscriptor
+# inactivo no ocupa hilos. Los handlers sync publican desde el threadpool; el evento se
+# serializa una sola vez y se entrega con un único call_soon_threadsafe por loop. Si un
+# cliente lento llena su cola, se descartan sus eventos pendientes y recibe
+# "resincronizar" (debe volver a pedir la disponibilidad).
+#
+# El bus es por proceso: con varios workers, cada uno notifica los cambios que atiende.
+
+import asyncio
+import json
+import os
+import threading
+from sqlalchemy.orm import Session
+from app.utils.referencias import obtener_empleado
+
+EVENTOS_COLA_MAX = int(os.getenv("EVENTOS_COLA_MAX", 100))
+EVENTOS_MAX_SUSCRIPTORES = int(os.getenv("EVENTOS_MAX_SUSCRIPTORES", 10000))
+
+OCUPADO = "ocupado"
+LIBERADO = "liberado"
+RESINCRONIZAR = json.dumps({"tipo": "resincronizar"})
+
+
+class Suscripcion:
+    __slots__ = ("claves", "cola", "loop")
+
+    def __init__(self, claves, loop):
+        self.claves = claves
+        self.cola = asyncio.Queue(maxsize=EVENTOS_COLA_MAX)
+        self.loop = loop
+
+    def entregar(self, evento: str):
+        # Corre en el loop del suscriptor
+        if self.cola.full():
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            evento = RESINCRONIZAR
+        self.cola.put_nowait(evento)
+
+
+class BusEventos:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.canales = {}
+        self.suscriptores = 0
+        self.publicados = 0
+
+    def suscribir(self, claves) -> Suscripcion | None:
+        """Llamar desde el event loop. Devuelve None si se llegó al máximo de suscriptores."""
+        suscripcion = Suscripcion(tuple(set(claves)), asyncio.get_running_loop())
+        with self.lock:
+            if self.suscriptores >= EVENTOS_MAX_SUSCRIPTORES:
+                return None
+            self.suscriptores += 1
+            for clave in suscripcion.claves:
+                self.canales.setdefault(clave, set()).add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion: Suscripcion):
+        with self.lock:
+            self.suscriptores -= 1
+            for clave in suscripcion.claves:
+                canal = self.canales.get(clave)
+                if canal is not None:
+                    canal.discard(suscripcion)
+                    if not canal:
+                        del self.canales[clave]
+
+    def publicar(self, claves, evento: dict):
+        with self.lock:
+            self.publicados += 1
+            destinatarios = set()
+            for clave in claves:
+                destinatarios.update(self.canales.get(clave, ()))
+        if not destinatarios:
+            return
+        mensaje = json.dumps(evento, ensure_ascii=False, default=str)
+        por_loop = {}
+        for suscripcion in destinatarios:
+            por_loop.setdefault(suscripcion.loop, []).append(suscripcion)
+        for loop, suscripciones in por_loop.items():
+            try:
+                loop.call_soon_threadsafe(_entregar_todas, suscripciones, mensaje)
+            except RuntimeError:
+                pass  # loop cerrado (worker apagándose)
+
+    def estadisticas(self) -> dict:
+        with self.lock:
+            return {"suscriptores": self.suscriptores, "canales": len(self.canales), "publicados": self.publicados}
+
+
+def _entregar_todas(suscripciones, mensaje: str):
+    for suscripcion in suscripciones:
+        suscripcion.entregar(mensaje)
+
+
+bus_eventos = BusEventos()
+
+
+def claves_suscripcion(empleado_ids=(), negocio_ids=()):
+    return [("empleado", id) for id in empleado_ids] + [("negocio", id) for id in negocio_ids]
+
+
+def publicar_horario(db: Session, tipo: str, empleado_id: int, dia, hora_inicio, hora_fin):
+    """Avisa a los suscriptores del empleado y de su negocio. Llamar después del commit."""
+    if not bus_eventos.canales:
+        return  # nadie escuchando: ni siquiera buscar el negocio
+    empleado = obtener_empleado(db, empleado_id)
+    negocio_id = empleado.negocio_id if empleado else None
+    claves = claves_suscripcion([empleado_id], [negocio_id] if negocio_id is not None else [])
+    bus_eventos.publicar(claves, {
+        "tipo": tipo,
+        "empleado_id": empleado_id,
+        "negocio_id": negocio_id,
+        "dia": dia.isoformat(),
+        "hora_inicio": hora_inicio.isoformat(timespec="minutes"),
+        "hora_fin": hora_fin.isoformat(timespec="minutes"),
+    })
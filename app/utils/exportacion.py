@@ -0,0 +1,73 @@
+#EXPORTACIÓN DE TURNOS EN STREAMING
+# Recorre los turnos con un cursor del lado del servidor (yield_per + stream_results) y
+# va emitiendo bloques de NDJSON o CSV: la memoria queda constante sin importar cuántas
+# filas haya. Usa su propia sesión porque la del request se cierra antes de que termine
+# el streaming.
+
+import csv
+import io
+import json
+from datetime import date
+from app.db.session import SessionLocal
+from app.models.turno import Turno
+from app.models.user import User
+from app.utils.paginacion import filtrar_turnos
+
+FILAS_POR_BLOQUE = 1000
+
+COLUMNAS = (
+    "id", "dia", "hora_inicio", "hora_fin", "cliente_nombre", "cliente_email", "cliente_telefono",
+    "metodo_pago", "monto_pagado", "estado", "servicio_id", "empleado_id", "cliente_id",
+)
+
+def _filas_turnos(negocio_id: int | None, empleado_id: int | None, desde: date | None, hasta: date | None):
+    db = SessionLocal()
+    try:
+        query = db.query(*(getattr(Turno, columna) for columna in COLUMNAS))
+        query = filtrar_turnos(query, desde, hasta)
+        if empleado_id is not None:
+            query = query.filter(Turno.empleado_id == empleado_id)
+        if negocio_id is not None:
+            query = query.filter(Turno.empleado_id.in_(db.query(User.id).filter(User.negocio_id == negocio_id)))
+        query = query.order_by(Turno.dia, Turno.hora_inicio, Turno.id)
+        yield from query.execution_options(stream_results=True).yield_per(FILAS_POR_BLOQUE)
+    finally:
+        db.close()
+
+def _valor(valor):
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor
+
+# Campos que carga el público (nombre, email, teléfono): una planilla interpretaría como
+# fórmula una celda que empiece con estos caracteres
+_INICIO_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+def _celda(valor):
+    valor = _valor(valor)
+    if isinstance(valor, str) and valor.startswith(_INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+def exportar_ndjson(**filtros):
+    bloque = []
+    for fila in _filas_turnos(**filtros):
+        bloque.append(json.dumps({c: _valor(v) for c, v in zip(COLUMNAS, fila)}, ensure_ascii=False))
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield "\n".join(bloque) + "\n"
+            bloque = []
+    if bloque:
+        yield "\n".join(bloque) + "\n"
+
+def exportar_csv(**filtros):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS)
+    filas_en_buffer = 0
+    for fila in _filas_turnos(**filtros):
+        escritor.writerow([_celda(v) for v in fila])
+        filas_en_buffer += 1
+        if filas_en_buffer >= FILAS_POR_BLOQUE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            filas_en_buffer = 0
+    yield buffer.getvalue()
@@ -0,0 +1,75 @@
+#ÍNDICE DE INTERVALOS
+# Intervalos ocupados de un empleado en un día, en minutos desde la medianoche, guardados
+# fusionados y ordenados en dos array('i') paralelos (inicios y fines). Al ser disjuntos,
+# ambos arrays quedan ordenados y toda búsqueda es un bisect: O(log n) para consultar
+# solapamiento y para ubicar una inserción. Insertar en sí es O(n): la asignación por
+# slice corre el resto del array (un memmove de enteros, barato para los pocos
+# intervalos de un día, pero lineal).
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class IndiceIntervalos:
+    __slots__ = ("inicios", "fines")
+
+    def __init__(self, intervalos=()):
+        self.inicios = array("i")
+        self.fines = array("i")
+        for inicio, fin in sorted(intervalos):
+            if self.fines and inicio <= self.fines[-1]:
+                if fin > self.fines[-1]:
+                    self.fines[-1] = fin
+            else:
+                self.inicios.append(inicio)
+                self.fines.append(fin)
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def __iter__(self):
+        return zip(self.inicios, self.fines)
+
+    def agregar(self, inicio: int, fin: int):
+        """Agrega [inicio, fin) fusionándolo con los intervalos que toca o pisa.
+        Ubicarlo es O(log n); reemplazar el tramo [i, j) corre la cola del array, O(n)."""
+        i = bisect_left(self.fines, inicio)   # primero que termina en o después de inicio
+        j = bisect_right(self.inicios, fin)   # primero que empieza después de fin
+        if i < j:
+            inicio = min(inicio, self.inicios[i])
+            fin = max(fin, self.fines[j - 1])
+        self.inicios[i:j] = array("i", [inicio])
+        self.fines[i:j] = array("i", [fin])
+
+    def primer_solapado(self, inicio: int, fin: int) -> int:
+        """Índice del primer intervalo que se solapa con [inicio, fin), o -1."""
+        i = bisect_right(self.fines, inicio)
+        if i < len(self.inicios) and self.inicios[i] < fin:
+            return i
+        return -1
+
+    def solapa(self, inicio: int, fin: int) -> bool:
+        return self.primer_solapado(inicio, fin) != -1
+
+    def huecos(self, desde: int, hasta: int):
+        """Tramos libres (inicio, fin) dentro de [desde, hasta), en orden."""
+        actual = desde
+        for i in range(bisect_right(self.fines, desde), len(self.inicios)):
+            if self.inicios[i] >= hasta:
+                break
+            if self.inicios[i] > actual:
+                yield actual, self.inicios[i]
+            actual = max(actual, self.fines[i])
+        if actual < hasta:
+            yield actual, hasta
+
+    def slots_libres(self, desde: int, hasta: int, duracion: int, paso: int) -> list[int]:
+        """Inicios de los slots de `duracion` que entran libres en [desde, hasta), alineados
+        a `desde` cada `paso` minutos."""
+        libres = []
+        for hueco_inicio, hueco_fin in self.huecos(desde, hasta):
+            actual = desde + -(-(hueco_inicio - desde) // paso) * paso
+            while actual + duracion <= hueco_fin:
+                libres.append(actual)
+                actual += paso
+        return libres
@@ -0,0 +1,56 @@
+#PAGINACIÓN POR CURSOR (KEYSET)
+# En vez de OFFSET, cada página arranca después de la última fila de la anterior, con un
+# orden estable respaldado por índices: la latencia no crece con el tamaño de la tabla.
+# El cursor de la página siguiente viaja en el header X-Siguiente-Cursor (la respuesta
+# sigue siendo una lista); si no hay header, no hay más páginas.
+
+from datetime import date, time
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from app.models.turno import Turno
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+HEADER_CURSOR = "X-Siguiente-Cursor"
+
+def _publicar_cursor(response: Response, filas, limit: int, a_cursor):
+    if len(filas) > limit:
+        filas = filas[:limit]
+        response.headers[HEADER_CURSOR] = a_cursor(filas[-1])
+    return filas
+
+def paginar_por_id(query, modelo, limit: int, after_id: int | None, response: Response):
+    """Orden por id ascendente; la página siguiente se pide con after_id."""
+    if after_id is not None:
+        query = query.filter(modelo.id > after_id)
+    filas = query.order_by(modelo.id).limit(limit + 1).all()
+    return _publicar_cursor(response, filas, limit, lambda fila: str(fila.id))
+
+def cursor_turno(turno) -> str:
+    return f"{turno.dia.isoformat()}T{turno.hora_inicio.isoformat()}_{turno.id}"
+
+def leer_cursor_turno(cursor: str):
+    try:
+        fecha_hora, turno_id = cursor.rsplit("_", 1)
+        dia, hora = fecha_hora.split("T")
+        return date.fromisoformat(dia), time.fromisoformat(hora), int(turno_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def paginar_turnos(query, limit: int, cursor: str | None, response: Response):
+    """Orden cronológico (dia, hora_inicio, id); la página siguiente se pide con cursor."""
+    if cursor:
+        query = query.filter(
+            tuple_(Turno.dia, Turno.hora_inicio, Turno.id) > tuple_(*leer_cursor_turno(cursor))
+        )
+    filas = query.order_by(Turno.dia, Turno.hora_inicio, Turno.id).limit(limit + 1).all()
+    return _publicar_cursor(response, filas, limit, cursor_turno)
+
+def filtrar_turnos(query, desde: date | None = None, hasta: date | None = None, estado: str | None = None):
+    if desde is not None:
+        query = query.filter(Turno.dia >= desde)
+    if hasta is not None:
+        query = query.filter(Turno.dia <= hasta)
+    if estado is not None:
+        query = query.filter(Turno.estado == estado)
+    return query
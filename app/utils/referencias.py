@@ -0,0 +1,125 @@
+#CACHE DE DATOS DE REFERENCIA
+# Servicios, negocios (por id y por alias) y el negocio de cada empleado cambian poco y
+# se consultan en cada reserva y en cada ruta de admin. Se leen a través de una cache con
+# TTL (REFERENCIAS_CACHE_TTL, por defecto 300 s; 0 la desactiva) y tamaño acotado
+# (REFERENCIAS_CACHE_MAX). Se guardan copias inmutables, nunca objetos de la sesión.
+#
+# Los handlers que crean, editan o borran estas filas llaman a invalidar_* después del
+# commit; en otros workers el cambio se ve cuando vence el TTL. Los "no existe" no se
+# guardan: un alta nueva se ve al instante en todos los workers.
+#
+# Invalidar también sube las versiones de app/utils/versiones.py (ETag de disponibilidad).
+
+from typing import NamedTuple
+from sqlalchemy.orm import Session
+from app.core.cache import cache_desde_entorno
+from app.utils.versiones import cambio_catalogo, cambio_negocio
+from app.models.negocio import Negocio
+from app.models.servicio import Servicio
+from app.models.user import User
+
+cache_referencias = cache_desde_entorno("referencias", "REFERENCIAS_CACHE", ttl=300, max_entradas=10000)
+
+
+class ServicioRef(NamedTuple):
+    id: int
+    nombre: str
+    duracion: int
+    precio: float
+    empleado_id: int
+    negocio_id: int | None
+
+
+class NegocioRef(NamedTuple):
+    id: int
+    nombre: str
+    alias: str
+    direccion: str
+    provincia: str
+
+
+class EmpleadoRef(NamedTuple):
+    id: int
+    negocio_id: int | None
+    rol: str
+
+
+_COLUMNAS_SERVICIO = (Servicio.id, Servicio.nombre, Servicio.duracion, Servicio.precio,
+                      Servicio.empleado_id, Servicio.negocio_id)
+_COLUMNAS_NEGOCIO = (Negocio.id, Negocio.nombre, Negocio.alias, Negocio.direccion, Negocio.provincia)
+
+
+def obtener_servicios(db: Session, ids) -> dict[int, ServicioRef]:
+    """Los servicios pedidos que existen, por id; los que faltan en cache, en una consulta."""
+    encontrados = {}
+    faltantes = []
+    for id in set(ids):
+        servicio = cache_referencias.get(("servicio", id))
+        if servicio is None:
+            faltantes.append(id)
+        else:
+            encontrados[id] = servicio
+    if faltantes:
+        for fila in db.query(*_COLUMNAS_SERVICIO).filter(Servicio.id.in_(faltantes)):
+            servicio = ServicioRef(*fila)
+            cache_referencias.set(("servicio", servicio.id), servicio)
+            encontrados[servicio.id] = servicio
+    return encontrados
+
+
+def obtener_servicio(db: Session, id: int) -> ServicioRef | None:
+    return obtener_servicios(db, [id]).get(id)
+
+
+def _guardar_negocio(negocio: NegocioRef) -> NegocioRef:
+    cache_referencias.set(("negocio", negocio.id), negocio)
+    cache_referencias.set(("alias", negocio.alias), negocio)
+    return negocio
+
+
+def obtener_negocio(db: Session, id: int) -> NegocioRef | None:
+    negocio = cache_referencias.get(("negocio", id))
+    if negocio is None:
+        fila = db.query(*_COLUMNAS_NEGOCIO).filter(Negocio.id == id).first()
+        negocio = _guardar_negocio(NegocioRef(*fila)) if fila else None
+    return negocio
+
+
+def obtener_negocio_por_alias(db: Session, alias: str) -> NegocioRef | None:
+    negocio = cache_referencias.get(("alias", alias))
+    if negocio is None:
+        fila = db.query(*_COLUMNAS_NEGOCIO).filter(Negocio.alias == alias).first()
+        negocio = _guardar_negocio(NegocioRef(*fila)) if fila else None
+    return negocio
+
+
+def obtener_empleado(db: Session, id: int) -> EmpleadoRef | None:
+    """Negocio y rol de un usuario (para validar pertenencia sin traer la fila entera)."""
+    empleado = cache_referencias.get(("empleado", id))
+    if empleado is None:
+        fila = db.query(User.id, User.negocio_id, User.rol).filter(User.id == id).first()
+        if fila:
+            empleado = EmpleadoRef(fila.id, fila.negocio_id, str(getattr(fila.rol, "value", fila.rol)))
+            cache_referencias.set(("empleado", id), empleado)
+    return empleado
+
+
+def invalidar_servicio(id: int):
+    cache_referencias.delete(("servicio", id))
+    cambio_catalogo()
+
+
+def invalidar_negocio(id: int, *aliases: str):
+    """Pasar también los alias viejos si el alias cambió."""
+    negocio = cache_referencias.get(("negocio", id))
+    if negocio is not None:
+        cache_referencias.delete(("alias", negocio.alias))
+    for alias in aliases:
+        cache_referencias.delete(("alias", alias))
+    cache_referencias.delete(("negocio", id))
+    cambio_negocio(id)
+
+
+def invalidar_empleado(id: int):
+    cache_referencias.delete(("empleado", id))
+    cambio_catalogo()
@@ -1,6 +1,11 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+import asyncio
+import threading
 import os
 from dotenv import load_dotenv
 
@@ -10,16 +15,57 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Costo de bcrypt. Los hashes con otro costo se rehashean en el próximo login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Hilos dedicados a bcrypt (libera el GIL) y máximo de hashes pendientes antes de responder 503
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", 4))
+HASH_COLA_MAX = int(os.getenv("HASH_COLA_MAX", 64))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_pool_hash = None
+_cupos_hash = None
+
+def configurar_pool_hash(workers: int = HASH_WORKERS, cola_max: int = HASH_COLA_MAX):
+    global _pool_hash, _cupos_hash
+    if _pool_hash is not None:
+        _pool_hash.shutdown(wait=True)
+    _pool_hash = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    _cupos_hash = threading.BoundedSemaphore(cola_max)
+
+configurar_pool_hash()
+
+def _en_pool_hash(fn, *args):
+    """Ejecuta fn en el pool de bcrypt. Dentro de un endpoint async (run_sync) espera sin
+    bloquear el event loop; en un endpoint sync espera en su propio hilo."""
+    cupos = _cupos_hash
+    if not cupos.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Servidor ocupado, reintentá en unos segundos",
+                            headers={"Retry-After": "1"})
+    futuro = _pool_hash.submit(fn, *args)
+    futuro.add_done_callback(lambda _: cupos.release())
+    if in_greenlet():
+        return await_only(asyncio.wrap_future(futuro))
+    return futuro.result()
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _en_pool_hash(pwd_context.hash, password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _en_pool_hash(pwd_context.verify, plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Devuelve (valida, hash_nuevo); hash_nuevo no es None si el costo cambió."""
+    return _en_pool_hash(pwd_context.verify_and_update, plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
@@ -0,0 +1,128 @@
+#SLOTS MATERIALIZADOS
+# Con SLOTS_MATERIALIZADOS=1 los horarios de cada agenda se guardan como filas de `slots`
+# (libre/ocupado) al crear la agenda, y se actualizan en la misma transacción que cada
+# alta, cambio o baja de turno. La disponibilidad pasa a ser un único range scan indexado.
+# Al activarlo sobre una base con datos: python -m app.utils.slots regenerar
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+from app.models.agenda import Agenda
+from app.models.slot import Slot
+from app.models.turno import Turno
+from app.utils.disponibilidad import a_minutos, formatear_minutos
+from app.utils.intervalos import IndiceIntervalos
+
+SLOTS_MATERIALIZADOS = os.getenv("SLOTS_MATERIALIZADOS", "0").lower() in ("1", "true", "si")
+
+LIBRE = "libre"
+OCUPADO = "ocupado"
+
+def _hora(minutos: int):
+    return (datetime.min + timedelta(minutes=minutos)).time()
+
+def generar_slots(db: Session, empleado_id: int, agendas):
+    """Inserta los slots de las agendas dadas (objetos o dicts con dia/hora_inicio/hora_fin/
+    duracion_turno), marcando ocupados los que pisan turnos existentes."""
+    agendas = [a if isinstance(a, dict) else {
+        "dia": a.dia, "hora_inicio": a.hora_inicio, "hora_fin": a.hora_fin, "duracion_turno": a.duracion_turno
+    } for a in agendas]
+    if not agendas:
+        return
+    dias = {a["dia"] for a in agendas}
+    turnos = db.query(Turno.dia, Turno.hora_inicio, Turno.hora_fin).filter(
+        Turno.empleado_id == empleado_id,
+        Turno.dia.in_(dias)
+    ).all()
+    ocupados_por_dia = {}
+    for dia, hora_inicio, hora_fin in turnos:
+        ocupados_por_dia.setdefault(dia, []).append((a_minutos(hora_inicio), a_minutos(hora_fin)))
+
+    filas = []
+    for agenda in agendas:
+        ocupados = IndiceIntervalos(ocupados_por_dia.get(agenda["dia"], []))
+        duracion = agenda["duracion_turno"]
+        inicio, fin = a_minutos(agenda["hora_inicio"]), a_minutos(agenda["hora_fin"])
+        for actual in range(inicio, fin - duracion + 1, duracion):
+            ocupado = ocupados.solapa(actual, actual + duracion)
+            filas.append({
+                "empleado_id": empleado_id,
+                "dia": agenda["dia"],
+                "hora_inicio": _hora(actual),
+                "hora_fin": _hora(actual + duracion),
+                "estado": OCUPADO if ocupado else LIBRE,
+            })
+    if filas:
+        db.execute(insert(Slot), filas)
+
+def ocupar_slots(db: Session, empleado_id: int, dia: date, hora_inicio, hora_fin):
+    db.execute(update(Slot).where(
+        Slot.empleado_id == empleado_id,
+        Slot.dia == dia,
+        Slot.hora_inicio < hora_fin,
+        Slot.hora_fin > hora_inicio
+    ).values(estado=OCUPADO))
+
+def recalcular_slots_dia(db: Session, empleado_id: int, dia: date):
+    """Tras modificar o borrar turnos: libera el día y vuelve a ocupar según los turnos que quedan.
+    Llamar después de un flush para que la consulta vea el cambio."""
+    db.execute(update(Slot).where(Slot.empleado_id == empleado_id, Slot.dia == dia).values(estado=LIBRE))
+    turnos = db.query(Turno.hora_inicio, Turno.hora_fin).filter(
+        Turno.empleado_id == empleado_id,
+        Turno.dia == dia
+    ).all()
+    for hora_inicio, hora_fin in turnos:
+        ocupar_slots(db, empleado_id, dia, hora_inicio, hora_fin)
+
+def turno_cambiado(db: Session, empleado_id: int, *dias: date):
+    if not SLOTS_MATERIALIZADOS:
+        return
+    db.flush()
+    for dia in {d for d in dias if d is not None}:
+        recalcular_slots_dia(db, empleado_id, dia)
+
+def turno_creado(db: Session, turno):
+    if SLOTS_MATERIALIZADOS:
+        ocupar_slots(db, turno.empleado_id, turno.dia, turno.hora_inicio, turno.hora_fin)
+
+def agendas_creadas(db: Session, empleado_id: int, agendas):
+    if SLOTS_MATERIALIZADOS:
+        generar_slots(db, empleado_id, agendas)
+
+def disponibilidad_desde_slots(db: Session, empleado_id: int, desde: date, dias: int) -> list[dict]:
+    filas = db.query(Slot.dia, Slot.hora_inicio).filter(
+        Slot.empleado_id == empleado_id,
+        Slot.estado == LIBRE,
+        Slot.dia >= desde,
+        Slot.dia < desde + timedelta(days=dias)
+    ).order_by(Slot.dia, Slot.hora_inicio).all()
+
+    dias_disponibles = []
+    for dia, hora_inicio in filas:
+        if not dias_disponibles or dias_disponibles[-1]["fecha"] != dia.isoformat():
+            dias_disponibles.append({"fecha": dia.isoformat(), "horarios": []})
+        dias_disponibles[-1]["horarios"].append(formatear_minutos(a_minutos(hora_inicio)))
+    return dias_disponibles
+
+def regenerar_slots(db: Session, desde: date):
+    """Reconstruye los slots de todas las agendas a partir de `desde`."""
+    db.execute(delete(Slot).where(Slot.dia >= desde))
+    agendas = db.query(Agenda).filter(Agenda.dia >= desde).all()
+    por_empleado = {}
+    for agenda in agendas:
+        por_empleado.setdefault(agenda.empleado_id, []).append(agenda)
+    for empleado_id, agendas_empleado in por_empleado.items():
+        generar_slots(db, empleado_id, agendas_empleado)
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["regenerar"]:
+        from app.db.session import SessionLocal
+        from app import models
+        db = SessionLocal()
+        try:
+            regenerar_slots(db, date.today())
+            db.commit()
+        finally:
+            db.close()
@@ -0,0 +1,52 @@
+#ESCRITURA DE TURNOS
+# Las altas y cambios de turnos por fuera de /reserva (superadmin, empleado) siguen las
+# mismas reglas que reservar_turno: lock por (empleado, día) durante toda la transacción,
+# consulta de solapamiento y la restricción de la DB informada como horario ocupado.
+
+from contextlib import contextmanager
+from datetime import date, time
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.db.locks import bloqueo_empleados_dias
+from app.models.turno import Turno
+
+HORARIO_OCUPADO = "Este horario ya está ocupado"
+
+
+def turno_solapado(db: Session, empleado_id: int, dia: date, hora_inicio: time, hora_fin: time,
+                   excluir_id: int | None = None) -> bool:
+    query = db.query(Turno.id).filter(
+        Turno.empleado_id == empleado_id,
+        Turno.dia == dia,
+        Turno.hora_inicio < hora_fin,
+        Turno.hora_fin > hora_inicio
+    )
+    if excluir_id is not None:
+        query = query.filter(Turno.id != excluir_id)
+    return query.first() is not None
+
+
+def horario_nuevo(turno: Turno, cambios: dict) -> tuple[date, time, time]:
+    """(dia, hora_inicio, hora_fin) que queda después de aplicar los cambios."""
+    return tuple(cambios.get(campo, getattr(turno, campo)) for campo in ("dia", "hora_inicio", "hora_fin"))
+
+
+def validar_horario_turno(db: Session, empleado_id: int, dia: date, hora_inicio: time, hora_fin: time,
+                          excluir_id: int | None = None):
+    if hora_inicio >= hora_fin:
+        raise HTTPException(status_code=400, detail="La hora de inicio debe ser anterior a la de fin")
+    if turno_solapado(db, empleado_id, dia, hora_inicio, hora_fin, excluir_id):
+        raise HTTPException(status_code=400, detail=HORARIO_OCUPADO)
+
+
+@contextmanager
+def escritura_turnos(db: Session, claves):
+    """Envuelve validación, escritura y commit de los turnos de esos (empleado_id, dia)."""
+    with bloqueo_empleados_dias(db, claves):
+        try:
+            yield
+        except IntegrityError:
+            # La restricción de no solapamiento de la DB (ver db/migraciones.py)
+            db.rollback()
+            raise HTTPException(status_code=400, detail=HORARIO_OCUPADO)
@@ -0,0 +1,92 @@
+#VERSIONES PARA RESPUESTAS CONDICIONALES
+# Contadores baratos que suben con cada escritura que cambia una disponibilidad pública:
+#   - por empleado: agendas y turnos (lo sube invalidar_disponibilidad)
+#   - por negocio: cambios en el negocio y en la disponibilidad de sus empleados
+#   - catálogo: altas, cambios y bajas de empleados y servicios (pocas, de admin)
+# Los ETag de /disponibilidad se arman con estos contadores, así que un If-None-Match
+# se contesta con 304 sin consultar agendas ni turnos.
+#
+# Los contadores son por proceso. Cada ETag lleva la época del proceso (otro worker no lo
+# reconoce y contesta 200) y la ventana de tiempo actual (ETAG_VENTANA, por defecto 60 s,
+# igual que el TTL de la cache de disponibilidad): un cambio atendido por otro worker se
+# refleja a lo sumo al cambiar de ventana.
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+ETAG_VENTANA = int(os.getenv("ETAG_VENTANA", 60))
+
+EPOCA = uuid.uuid4().hex[:8]
+_INICIO = time.time()
+
+_lock = threading.Lock()
+_empleados = {}
+_negocios = {}
+_catalogo = [0, _INICIO]
+# Negocio de cada empleado que ya salió en una respuesta por negocio
+_negocio_de = {}
+
+
+def _subir(contadores: dict, clave):
+    version, _ = contadores.get(clave, (0, _INICIO))
+    contadores[clave] = (version + 1, time.time())
+
+
+def cambio_empleado(empleado_id: int):
+    with _lock:
+        _subir(_empleados, empleado_id)
+        negocio_id = _negocio_de.get(empleado_id)
+        if negocio_id is not None:
+            _subir(_negocios, negocio_id)
+
+
+def cambio_negocio(negocio_id: int):
+    with _lock:
+        _subir(_negocios, negocio_id)
+
+
+def cambio_catalogo():
+    with _lock:
+        _catalogo[0] += 1
+        _catalogo[1] = time.time()
+
+
+def recordar_empleados(negocio_id: int, empleado_ids):
+    """Llamar antes de calcular la disponibilidad del negocio: desde ahí, los cambios de
+    esos empleados también suben la versión del negocio."""
+    with _lock:
+        for empleado_id in empleado_ids:
+            _negocio_de[empleado_id] = negocio_id
+
+
+class Validador:
+    __slots__ = ("etag", "ultima_modificacion")
+
+    def __init__(self, etag: str, ultima_modificacion: float):
+        self.etag = etag
+        self.ultima_modificacion = ultima_modificacion
+
+
+def _validador(versiones, modificaciones, *parametros) -> Validador:
+    ahora = time.time()
+    ventana = int(ahora // ETAG_VENTANA) if ETAG_VENTANA > 0 else ahora
+    huella = hashlib.blake2b(repr((versiones, ventana, parametros)).encode(), digest_size=8).hexdigest()
+    inicio_ventana = ventana * ETAG_VENTANA if ETAG_VENTANA > 0 else ahora
+    return Validador(f'W/"{EPOCA}-{huella}"', max(*modificaciones, inicio_ventana))
+
+
+def validador_empleado(empleado_id: int, *parametros) -> Validador:
+    """Tomarlo antes de calcular: si algo se escribe mientras tanto, el ETag queda viejo."""
+    with _lock:
+        version, modificado = _empleados.get(empleado_id, (0, _INICIO))
+    return _validador((version,), (modificado,), empleado_id, *parametros)
+
+
+def validador_negocio(negocio_id: int, *parametros) -> Validador:
+    with _lock:
+        version, modificado = _negocios.get(negocio_id, (0, _INICIO))
+        catalogo, catalogo_modificado = _catalogo
+    return _validador((version, catalogo), (modificado, catalogo_modificado), negocio_id, *parametros)
@@ -0,0 +1,41 @@
+#BENCHMARK DE HASHING
+# Logins por segundo (verify_password) con distintos tamaños del pool de bcrypt.
+# Uso: python -m benchmarks.bench_hash --rounds 12 --pools 1 2 4 8 --clientes 32 --logins 200
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.utils import security
+
+
+def medir(workers: int, clientes: int, logins: int, hash_guardado: str) -> float:
+    security.configurar_pool_hash(workers=workers, cola_max=max(clientes, 1))
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clientes) as ex:
+        resultados = list(ex.map(lambda _: security.verify_password("clave-de-prueba", hash_guardado), range(logins)))
+    duracion = time.perf_counter() - inicio
+    assert all(resultados)
+    return logins / duracion
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=security.BCRYPT_ROUNDS)
+    parser.add_argument("--pools", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clientes", type=int, default=32, help="requests de login concurrentes")
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    contexto = security.pwd_context.copy(
+        bcrypt__default_rounds=args.rounds, bcrypt__min_rounds=args.rounds, bcrypt__max_rounds=args.rounds
+    )
+    security.pwd_context = contexto
+    hash_guardado = contexto.hash("clave-de-prueba")
+
+    print(f"bcrypt rounds={args.rounds} clientes={args.clientes} logins={args.logins}")
+    for workers in args.pools:
+        print(f"  pool={workers:>3}  {medir(workers, args.clientes, args.logins, hash_guardado):8.1f} logins/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#BENCHMARK DEL ÍNDICE DE INTERVALOS
+# Compara el cálculo de slots libres de un día con IndiceIntervalos contra el barrido
+# lineal anterior (un any() sobre todos los turnos por cada slot candidato).
+# Uso: python -m benchmarks.bench_intervalos --turnos 10 50 200 --repeticiones 2000
+
+import argparse
+import random
+import timeit
+from app.utils.intervalos import IndiceIntervalos
+
+JORNADA = (8 * 60, 20 * 60)
+
+
+def slots_lineal(ocupados, desde, hasta, duracion, paso):
+    libres = []
+    actual = desde
+    while actual + duracion <= hasta:
+        if not any(actual < o_fin and actual + duracion > o_inicio for o_inicio, o_fin in ocupados):
+            libres.append(actual)
+        actual += paso
+    return libres
+
+
+def slots_indice(ocupados, desde, hasta, duracion, paso):
+    return IndiceIntervalos(ocupados).slots_libres(desde, hasta, duracion, paso)
+
+
+def turnos_al_azar(cantidad, duracion):
+    inicio, fin = JORNADA
+    return [(m, m + duracion) for m in (random.randrange(inicio, fin - duracion) for _ in range(cantidad))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turnos", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--paso", type=int, default=5)
+    parser.add_argument("--duracion", type=int, default=30)
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    args = parser.parse_args()
+
+    desde, hasta = JORNADA
+    print(f"jornada {desde // 60}-{hasta // 60} h, slots de {args.duracion} min cada {args.paso} min")
+    for cantidad in args.turnos:
+        ocupados = turnos_al_azar(cantidad, args.duracion)
+        assert slots_lineal(ocupados, desde, hasta, args.duracion, args.paso) == \
+            slots_indice(ocupados, desde, hasta, args.duracion, args.paso)
+        tiempos = {}
+        for nombre, fn in (("lineal", slots_lineal), ("índice", slots_indice)):
+            total = timeit.timeit(lambda: fn(ocupados, desde, hasta, args.duracion, args.paso), number=args.repeticiones)
+            tiempos[nombre] = total / args.repeticiones * 1e6
+        print(f"  turnos={cantidad:>4}  lineal {tiempos['lineal']:9.1f} µs  índice {tiempos['índice']:8.1f} µs"
+              f"  x{tiempos['lineal'] / tiempos['índice']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
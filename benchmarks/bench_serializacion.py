@@ -0,0 +1,136 @@
+#BENCHMARK DE SERIALIZACIÓN DE LISTADOS
+# Mide consulta + serialización de un listado grande de turnos (10k filas por defecto)
+# con el camino anterior (objetos ORM + response_model o jsonable_encoder + json) contra
+# el nuevo (solo columnas + orjson, con y sin validación Pydantic). Ver
+# app/core/serializacion.py.
+#
+# Uso: python -m benchmarks.bench_serializacion --filas 10000 --repeticiones 5
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from datetime import date, time as hora, timedelta
+
+
+def sembrar(filas: int):
+    from sqlalchemy import insert
+    from app.db.session import SessionLocal
+    from app.models import Turno
+
+    random.seed(1)
+    hoy = date.today()
+    db = SessionLocal()
+    try:
+        db.execute(insert(Turno), [
+            dict(dia=hoy + timedelta(days=i % 60), hora_inicio=hora(9 + i % 9), hora_fin=hora(9 + i % 9, 30),
+                 cliente_nombre=f"Cliente {i}", cliente_email=f"cliente{i}@orbio-bench.com",
+                 cliente_telefono=f"+54351{i:07d}", metodo_pago=random.choice(("efectivo", "tarjeta")),
+                 monto_pagado=random.choice((0.0, 1500.0)), estado="confirmado",
+                 servicio_id=1 + i % 50, empleado_id=1 + i % 50)
+            for i in range(filas)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def casos():
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from pydantic import TypeAdapter
+    from app.core import serializacion
+    from app.core.serializacion import columnas, respuesta_filas
+    from app.models import Turno
+    from app.schemas.turno import ShowTurno
+
+    campo = create_model_field(name="Response_listar", type_=list[ShowTurno], mode="serialization")
+    esquema = TypeAdapter(list[ShowTurno])
+    columnas_turno = columnas(Turno, ShowTurno.model_fields)
+
+    def orm(db):
+        return db.query(Turno).order_by(Turno.id).all()
+
+    def tuplas(db):
+        return db.query(*columnas_turno).order_by(Turno.id).all()
+
+    def response_model(filas):
+        contenido = asyncio.run(serialize_response(field=campo, response_content=filas))
+        return JSONResponse(contenido).body
+
+    def encoder(filas):
+        return JSONResponse(jsonable_encoder(filas)).body
+
+    def sin_orjson(filas):
+        original, serializacion.orjson = serializacion.orjson, None
+        try:
+            return respuesta_filas(filas).body
+        finally:
+            serializacion.orjson = original
+
+    return [
+        ("antes: ORM + response_model", orm, response_model),
+        ("antes: ORM + jsonable_encoder", orm, encoder),
+        ("columnas + validación pydantic", tuplas, lambda filas: respuesta_filas(filas, esquema=esquema).body),
+        ("columnas + orjson", tuplas, lambda filas: respuesta_filas(filas).body),
+        ("columnas + json (sin orjson)", tuplas, sin_orjson),
+    ]
+
+
+def medir(consultar, serializar, repeticiones: int):
+    from app.db.session import SessionLocal
+
+    consulta, serializacion = [], []
+    for _ in range(repeticiones):
+        db = SessionLocal()
+        try:
+            inicio = time.perf_counter()
+            filas = consultar(db)
+            medio = time.perf_counter()
+            cuerpo = serializar(filas)
+            fin = time.perf_counter()
+        finally:
+            db.close()
+        consulta.append(medio - inicio)
+        serializacion.append(fin - medio)
+    return statistics.median(consulta) * 1000, statistics.median(serializacion) * 1000, len(cuerpo)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--db-url", default="sqlite:///./bench_serializacion.db")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.db_url
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("LOG_NIVEL", "WARNING")
+    if args.db_url.startswith("sqlite:///"):
+        archivo = args.db_url.removeprefix("sqlite:///")
+        if os.path.exists(archivo):
+            os.remove(archivo)
+
+    from app.db.migraciones import aplicar_migraciones
+    from app import models  # noqa: F401
+
+    aplicar_migraciones()
+    sembrar(args.filas)
+
+    print(f"{args.filas} turnos, mediana de {args.repeticiones} repeticiones")
+    print(f"{'camino':34} {'consulta ms':>12} {'serializ. ms':>13} {'total ms':>9} {'bytes':>10}")
+    base = None
+    for nombre, consultar, serializar in casos():
+        consulta, serializacion, tamano = medir(consultar, serializar, args.repeticiones)
+        total = consulta + serializacion
+        base = base or total
+        print(f"{nombre:34} {consulta:12.1f} {serializacion:13.1f} {total:9.1f} {tamano:10}  x{base / total:.1f}")
+
+
+if __name__ == "__main__":
+    main()
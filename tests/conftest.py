@@ -0,0 +1,24 @@
+import os
+import tempfile
+import pytest
+from tests.datos import configurar_entorno, sembrar, token
+
+# Antes de importar la app: una base SQLite nueva por corrida
+_DIRECTORIO = tempfile.mkdtemp(prefix="orbio-pruebas-")
+configurar_entorno(f"sqlite:///{os.path.join(_DIRECTORIO, 'pruebas.db')}")
+
+
+@pytest.fixture(scope="session")
+def cliente():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def datos(cliente):
+    datos = sembrar()
+    datos.headers_super_admin = token(datos.super_admin_id, "super_admin")
+    datos.headers_admin = token(datos.admin_id, "admin")
+    datos.headers_empleado = token(datos.empleado_ids[0], "empleado")
+    return datos
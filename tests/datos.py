@@ -0,0 +1,80 @@
+#DATOS DE PRUEBA
+# Un negocio con su admin, dos empleados con un servicio cada uno y agenda de 9 a 13 los
+# próximos DIAS_AGENDA días, más un super_admin. La app lee la configuración del entorno
+# al importarse: configurar_entorno() va antes de cualquier import de `app`.
+
+import os
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+DIAS_AGENDA = 10
+
+
+def configurar_entorno(database_url: str):
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "pruebas")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ.setdefault("LOG_NIVEL", "WARNING")
+
+
+def token(usuario_id: int, rol: str) -> dict:
+    from app.utils.security import create_access_token
+    return {"Authorization": "Bearer " + create_access_token({"sub": str(usuario_id), "rol": rol})}
+
+
+def sembrar(alias: str = "negocio-prueba") -> SimpleNamespace:
+    from app.db.session import SessionLocal
+    from app.models import Agenda, Negocio, Servicio, User
+    from app.models.user import UserRole
+    from app.utils.security import hash_password
+
+    clave = hash_password("clave")
+    hoy = date.today()
+    db = SessionLocal()
+    try:
+        negocio = Negocio(nombre="Negocio", alias=alias, direccion="Calle 123", provincia="Córdoba")
+        db.add(negocio)
+        db.flush()
+        super_admin = User(nombre="super", email=f"super@{alias}.com", hashed_password=clave, rol=UserRole.super_admin)
+        admin = User(nombre="admin", email=f"admin@{alias}.com", hashed_password=clave,
+                     rol=UserRole.admin, negocio_id=negocio.id)
+        empleados = [
+            User(nombre=f"empleado {i}", email=f"empleado{i}@{alias}.com", hashed_password=clave,
+                 rol=UserRole.empleado, negocio_id=negocio.id)
+            for i in range(2)
+        ]
+        db.add_all([super_admin, admin, *empleados])
+        db.flush()
+        servicios = [
+            Servicio(nombre="corte", precio=1000, duracion=30, direccion="Calle 123",
+                     empleado_id=empleado.id, negocio_id=negocio.id)
+            for empleado in empleados
+        ]
+        db.add_all(servicios)
+        db.add_all([
+            Agenda(empleado_id=empleado.id, dia=hoy + timedelta(days=i),
+                   hora_inicio=time(9), hora_fin=time(13), duracion_turno=30)
+            for empleado in empleados for i in range(DIAS_AGENDA)
+        ])
+        db.commit()
+        return SimpleNamespace(
+            hoy=hoy,
+            alias=alias,
+            negocio_id=negocio.id,
+            super_admin_id=super_admin.id,
+            admin_id=admin.id,
+            empleado_ids=[empleado.id for empleado in empleados],
+            servicio_ids=[servicio.id for servicio in servicios],
+        )
+    finally:
+        db.close()
+
+
+def pedido_reserva(datos, dia: date, hora_inicio: str, empleado: int = 0, cliente: str = "Cliente") -> dict:
+    return dict(
+        cliente_nombre=cliente, cliente_email=f"{cliente.lower().replace(' ', '')}@prueba.com",
+        metodo_pago="efectivo", monto_pagado=0, estado="confirmado",
+        servicio_id=datos.servicio_ids[empleado], empleado_id=datos.empleado_ids[empleado],
+        dia=dia.isoformat(), hora_inicio=hora_inicio, hora_fin=hora_inicio,
+    )
@@ -0,0 +1,40 @@
+#RESERVAS CONCURRENTES DEL MISMO HORARIO
+# Corre en un proceso aparte (DB_ASYNC se lee al importar la app): siembra una base
+# nueva, dispara N reservas simultáneas del mismo slot sobre un único event loop
+# (httpx + ASGITransport, como un worker de uvicorn) e imprime los códigos en JSON.
+# Uso: DB_ASYNC=1 python -m tests.reserva_concurrente sqlite:////tmp/x.db 50
+
+import asyncio
+import json
+import sys
+from collections import Counter
+from datetime import timedelta
+from tests.datos import configurar_entorno, pedido_reserva, sembrar
+
+
+async def reservar(cantidad: int) -> Counter:
+    import httpx
+    from app.main import app
+    from app.db import session as db_session
+
+    datos = sembrar()
+    dia = datos.hoy + timedelta(days=1)
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://prueba") as cliente:
+        respuestas = await asyncio.gather(*(
+            cliente.post("/reserva", json=pedido_reserva(datos, dia, "10:00", cliente=f"Cliente {i}"))
+            for i in range(cantidad)
+        ))
+    if db_session.async_engine is not None:
+        await db_session.async_engine.dispose()  # los hilos de aiosqlite no dejan terminar el proceso
+    return Counter(respuesta.status_code for respuesta in respuestas)
+
+
+def main():
+    database_url, cantidad = sys.argv[1], int(sys.argv[2])
+    configurar_entorno(database_url)
+    print(json.dumps(asyncio.run(reservar(cantidad))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+
+def agenda(dia, hora_inicio, hora_fin):
+    return {"dia": dia.isoformat(), "hora_inicio": hora_inicio, "hora_fin": hora_fin, "duracion_turno": 30}
+
+
+def test_agenda_solapada_se_rechaza(cliente, datos):
+    dia = datos.hoy + timedelta(days=30)
+    headers = datos.headers_empleado
+    assert cliente.post("/empleados/agenda", json=agenda(dia, "09:00", "12:00"), headers=headers).status_code == 200
+    respuesta = cliente.post("/empleados/agenda", json=agenda(dia, "11:30", "14:00"), headers=headers)
+    assert respuesta.status_code == 400
+    # Tocarse en el borde no es solaparse
+    assert cliente.post("/empleados/agenda", json=agenda(dia, "12:00", "14:00"), headers=headers).status_code == 200
+
+
+def test_duracion_de_turno_invalida_se_rechaza(cliente, datos):
+    dia = datos.hoy + timedelta(days=31)
+    headers = datos.headers_empleado
+    for duracion in (0, -30):
+        pedido = dict(agenda(dia, "09:00", "12:00"), duracion_turno=duracion)
+        assert cliente.post("/empleados/agenda", json=pedido, headers=headers).status_code == 422
+        recurrente = dict(pedido, dias_semana=[0, 1, 2, 3, 4], desde=pedido.pop("dia"), semanas=52)
+        assert cliente.post("/empleados/agenda/recurrente", json=recurrente, headers=headers).status_code == 422
+    # Un turno más largo que el rango no entra nunca
+    pedido = dict(agenda(dia, "09:00", "09:20"), duracion_turno=30)
+    assert cliente.post("/empleados/agenda", json=pedido, headers=headers).status_code == 400
+    recurrente = dict(pedido, dias_semana=[0], desde=pedido.pop("dia"), semanas=1)
+    assert cliente.post("/empleados/agenda/recurrente", json=recurrente, headers=headers).status_code == 400
+    # Nada quedó guardado: la disponibilidad del empleado sigue respondiendo
+    respuesta = cliente.get(f"/disponibilidad/{datos.empleado_ids[0]}", params={"dias": 40})
+    assert respuesta.status_code == 200
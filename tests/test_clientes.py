@@ -0,0 +1,33 @@
+from app.utils import clientes
+from app.utils.clientes import normalizar_email, normalizar_telefono, obtener_o_crear_cliente
+
+
+def test_normalizacion_de_claves():
+    assert normalizar_email("  Ana@Ejemplo.COM ") == "ana@ejemplo.com"
+    assert normalizar_email("  ") is None
+    assert normalizar_telefono("0351 15-555-1234") == "+54351155551234"
+    assert normalizar_telefono("+1 (555) 010-9999") == "+15550109999"
+    assert normalizar_telefono("123") is None
+
+
+def test_alta_concurrente_del_mismo_cliente_devuelve_el_existente(cliente, monkeypatch):
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        primero = obtener_o_crear_cliente(db, "Ana", "ana.concurrente@prueba.com", None)
+        db.commit()
+
+        # La otra reserva lo insertó después de que esta buscara: la búsqueda inicial no lo ve
+        buscar = clientes._buscar
+        busquedas = []
+
+        def buscar_tarde(*args):
+            busquedas.append(args)
+            return None if len(busquedas) == 1 else buscar(*args)
+
+        monkeypatch.setattr(clientes, "_buscar", buscar_tarde)
+        assert obtener_o_crear_cliente(db, "Ana", "ANA.concurrente@prueba.com", None) == primero
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,82 @@
+# Presupuestos de consultas SQL por endpoint (ver app/db/metricas.py): un N+1 nuevo
+# hace fallar la prueba con el detalle de las sentencias repetidas.
+import pytest
+from datetime import timedelta
+from app.core.deps import cache_usuarios
+from app.db.metricas import contar_consultas
+from app.utils.disponibilidad import cache_disponibilidad
+from app.utils.referencias import cache_referencias
+from tests.datos import pedido_reserva, sembrar
+
+
+@pytest.fixture(autouse=True)
+def caches_frias():
+    # Se mide el peor caso: nada de lo que se consulta está en cache
+    for cache in (cache_disponibilidad, cache_referencias, cache_usuarios):
+        cache.limpiar()
+
+
+def test_disponibilidad_de_empleado(cliente, datos):
+    with contar_consultas(presupuesto=3):
+        respuesta = cliente.get(f"/disponibilidad/{datos.empleado_ids[0]}")
+    assert respuesta.status_code == 200
+
+
+def test_disponibilidad_de_negocio(cliente, datos):
+    with contar_consultas(presupuesto=4):
+        respuesta = cliente.get(f"/negocios/{datos.alias}/disponibilidad")
+    assert respuesta.status_code == 200
+
+
+def test_mis_turnos(cliente, datos):
+    with contar_consultas(presupuesto=2):
+        respuesta = cliente.get("/empleados/mis-turnos", headers=datos.headers_empleado)
+    assert respuesta.status_code == 200
+
+
+def test_listado_de_turnos(cliente, datos):
+    with contar_consultas(presupuesto=2):
+        respuesta = cliente.get("/superadmin/turnos", headers=datos.headers_super_admin)
+    assert respuesta.status_code == 200
+
+
+def test_overview_no_crece_con_la_cantidad_de_negocios(cliente, datos):
+    with contar_consultas() as antes:
+        respuesta = cliente.get("/superadmin/negocios/overview", headers=datos.headers_super_admin)
+    assert respuesta.status_code == 200
+    negocios_antes = len(respuesta.json())
+
+    for i in range(3):
+        sembrar(alias=f"overview-{i}")
+    cache_usuarios.limpiar()
+    with contar_consultas() as despues:
+        respuesta = cliente.get("/superadmin/negocios/overview", headers=datos.headers_super_admin)
+    assert len(respuesta.json()) == negocios_antes + 3
+    assert despues.cantidad == antes.cantidad, despues.repetidas()
+
+
+def test_reserva_batch_no_relee_los_turnos_creados(cliente, datos):
+    dia = (datos.hoy + timedelta(days=7)).isoformat()
+    pedido = dict(
+        cliente_nombre="Lote", cliente_email="lote@prueba.com", metodo_pago="efectivo", estado="confirmado",
+        turnos=[dict(servicio_id=datos.servicio_ids[i % 2], empleado_id=datos.empleado_ids[i % 2],
+                     dia=dia, hora_inicio=hora) for i, hora in enumerate(("09:00", "09:00", "10:00", "10:00"))],
+    )
+    with contar_consultas() as consultas:
+        respuesta = cliente.post("/reservas/batch", json=pedido)
+    assert respuesta.status_code == 200
+    assert [turno["hora_fin"] for turno in respuesta.json()] == ["09:30:00", "09:30:00", "10:30:00", "10:30:00"]
+    assert all(turno["id"] for turno in respuesta.json())
+    assert not [sql for sql, _ in consultas.repetidas() if "FROM turnos" in sql], consultas.repetidas()
+
+
+def test_presupuesto_estricto_no_reemplaza_una_respuesta_ya_confirmada(cliente, datos, monkeypatch):
+    import app.main
+    monkeypatch.setattr(app.main, "DB_PRESUPUESTO_CONSULTAS", 1)
+    monkeypatch.setattr(app.main, "DB_PRESUPUESTO_ESTRICTO", True)
+    dia = datos.hoy + timedelta(days=9)
+    respuesta = cliente.post("/reserva", json=pedido_reserva(datos, dia, "12:00"))
+    assert respuesta.status_code == 200
+    assert respuesta.headers["x-db-presupuesto-excedido"].endswith("/1")
+    # Un reintento ve la reserva hecha, no un error que la oculta
+    assert cliente.post("/reserva", json=pedido_reserva(datos, dia, "12:00")).status_code == 400
@@ -0,0 +1,34 @@
+import time
+from datetime import timedelta
+import pytest
+from starlette.websockets import WebSocketDisconnect
+from app.utils.eventos import bus_eventos
+from tests.datos import pedido_reserva
+
+
+def suscriptores_tras_procesar() -> int:
+    # El servidor procesa los mensajes del cliente en otro hilo: darle un momento
+    time.sleep(0.2)
+    return bus_eventos.estadisticas()["suscriptores"]
+
+
+def test_websocket_sigue_abierto_tras_mensajes_del_cliente(cliente, datos):
+    dia = datos.hoy + timedelta(days=3)
+    with cliente.websocket_connect(f"/eventos/ws?empleado_id={datos.empleado_ids[1]}") as ws:
+        ws.send_text("ping")
+        ws.send_bytes(b"\x00")
+        assert suscriptores_tras_procesar() == 1
+        respuesta = cliente.post("/reserva", json=pedido_reserva(datos, dia, "09:00", empleado=1))
+        assert respuesta.status_code == 200
+        evento = ws.receive_json()
+    assert evento == {
+        "tipo": "ocupado", "empleado_id": datos.empleado_ids[1], "negocio_id": datos.negocio_id,
+        "dia": dia.isoformat(), "hora_inicio": "09:00", "hora_fin": "09:30",
+    }
+
+
+def test_websocket_sin_filtros_se_rechaza(cliente):
+    with pytest.raises(WebSocketDisconnect) as error:
+        with cliente.websocket_connect("/eventos/ws") as ws:
+            ws.receive_text()
+    assert error.value.code == 1008
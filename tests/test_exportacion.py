@@ -0,0 +1,22 @@
+import csv
+import io
+from datetime import timedelta
+from tests.datos import pedido_reserva
+
+
+def test_csv_neutraliza_formulas_en_los_datos_del_cliente(cliente, datos):
+    dia = datos.hoy + timedelta(days=9)
+    pedido = dict(pedido_reserva(datos, dia, "09:00", empleado=1, cliente="=HYPERLINK(1)"),
+                  cliente_email="formula@prueba.com", cliente_telefono="+54 351 555 0000")
+    turno = cliente.post("/reserva", json=pedido)
+    assert turno.status_code == 200
+
+    respuesta = cliente.get("/superadmin/turnos/export", params={"formato": "csv", "desde": dia.isoformat(),
+                                                                 "hasta": dia.isoformat()},
+                            headers=datos.headers_super_admin)
+    filas = {fila["id"]: fila for fila in csv.DictReader(io.StringIO(respuesta.text))}
+    fila = filas[str(turno.json()["id"])]
+    assert fila["cliente_nombre"] == "'=HYPERLINK(1)"
+    assert fila["cliente_telefono"] == "'+54 351 555 0000"
+    assert fila["cliente_email"] == "formula@prueba.com"
+    assert fila["monto_pagado"] == "0.0"
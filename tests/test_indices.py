@@ -0,0 +1,18 @@
+from app.db.migraciones import CONSULTAS_CALIENTES, _usa_seq_scan, verificar_planes
+from app.db.session import engine
+
+
+def test_consultas_calientes_usan_indices(cliente):
+    # `cliente` importa la app, que aplica las migraciones sobre la base de pruebas
+    assert verificar_planes(engine) == []
+
+
+def test_la_verificacion_detecta_un_full_scan(cliente):
+    # Control: una columna sin índice tiene que aparecer como scan completo
+    with engine.connect() as conn:
+        assert _usa_seq_scan(conn, "SELECT * FROM turnos WHERE cliente_nombre = 'Cliente'")
+
+
+def test_hay_consultas_calientes_para_cada_tabla_indexada():
+    tablas = {sql.split(" FROM ")[1].split()[0] for sql in CONSULTAS_CALIENTES.values()}
+    assert {"agendas", "turnos", "servicios", "clientes", "users"} <= tablas
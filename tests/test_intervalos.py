@@ -0,0 +1,83 @@
+import random
+import pytest
+from app.utils.intervalos import IndiceIntervalos
+
+JORNADA = (0, 24 * 60)
+CASOS = 500
+
+
+def intervalos_al_azar(generador, cantidad):
+    inicio, fin = JORNADA
+    intervalos = []
+    for _ in range(cantidad):
+        desde = generador.randrange(inicio, fin - 1)
+        intervalos.append((desde, generador.randrange(desde + 1, min(desde + 180, fin) + 1)))
+    return intervalos
+
+
+# Referencias ingenuas, O(n²): minuto a minuto sobre la lista sin procesar
+
+def solapa_ingenuo(intervalos, inicio, fin):
+    return any(inicio < o_fin and fin > o_inicio for o_inicio, o_fin in intervalos)
+
+
+def huecos_ingenuo(intervalos, desde, hasta):
+    libres = [minuto for minuto in range(desde, hasta)
+              if not any(o_inicio <= minuto < o_fin for o_inicio, o_fin in intervalos)]
+    huecos = []
+    for minuto in libres:
+        if huecos and huecos[-1][1] == minuto:
+            huecos[-1][1] = minuto + 1
+        else:
+            huecos.append([minuto, minuto + 1])
+    return [tuple(hueco) for hueco in huecos]
+
+
+def slots_ingenuo(intervalos, desde, hasta, duracion, paso):
+    return [actual for actual in range(desde, hasta - duracion + 1, paso)
+            if not solapa_ingenuo(intervalos, actual, actual + duracion)]
+
+
+@pytest.fixture
+def generador():
+    return random.Random(14)
+
+
+def test_solapa_coincide_con_la_referencia(generador):
+    for _ in range(CASOS):
+        intervalos = intervalos_al_azar(generador, generador.randrange(0, 30))
+        indice = IndiceIntervalos(intervalos)
+        inicio = generador.randrange(*JORNADA)
+        fin = generador.randrange(inicio + 1, JORNADA[1] + 1)
+        assert indice.solapa(inicio, fin) == solapa_ingenuo(intervalos, inicio, fin)
+
+
+def test_huecos_coinciden_con_la_referencia(generador):
+    for _ in range(CASOS // 5):
+        intervalos = intervalos_al_azar(generador, generador.randrange(0, 30))
+        desde = generador.randrange(0, 12 * 60)
+        hasta = generador.randrange(desde + 1, JORNADA[1] + 1)
+        assert list(IndiceIntervalos(intervalos).huecos(desde, hasta)) == huecos_ingenuo(intervalos, desde, hasta)
+
+
+def test_slots_libres_coinciden_con_la_referencia(generador):
+    for _ in range(CASOS):
+        intervalos = intervalos_al_azar(generador, generador.randrange(0, 30))
+        desde = generador.randrange(0, 12 * 60)
+        hasta = generador.randrange(desde + 1, JORNADA[1] + 1)
+        duracion = generador.choice((15, 30, 45, 60))
+        paso = generador.choice((5, 15, duracion))
+        esperado = slots_ingenuo(intervalos, desde, hasta, duracion, paso)
+        assert IndiceIntervalos(intervalos).slots_libres(desde, hasta, duracion, paso) == esperado
+
+
+def test_agregar_equivale_a_construir_con_todos(generador):
+    for _ in range(CASOS):
+        intervalos = intervalos_al_azar(generador, generador.randrange(1, 30))
+        incremental = IndiceIntervalos()
+        for inicio, fin in intervalos:
+            incremental.agregar(inicio, fin)
+        assert list(incremental) == list(IndiceIntervalos(intervalos))
+        # Fusionados: disjuntos, ordenados y sin tramos que se toquen
+        tramos = list(incremental)
+        assert all(fin_a < inicio_b for (_, fin_a), (inicio_b, _) in zip(tramos, tramos[1:]))
@@ -0,0 +1,42 @@
+from datetime import timedelta
+from app.schemas.empleado import EmpleadoListado
+from app.schemas.turno import ShowTurno, TurnoDetalle
+from tests.datos import pedido_reserva
+
+
+def esquema_200(openapi, ruta):
+    return openapi["paths"][ruta]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+
+def test_listados_documentan_el_modelo_que_devuelven(cliente):
+    openapi = cliente.get("/openapi.json").json()
+    for ruta, modelo in (("/empleados/mis-turnos", ShowTurno), ("/superadmin/turnos", TurnoDetalle),
+                         ("/superadmin/empleados", EmpleadoListado)):
+        assert esquema_200(openapi, ruta)["items"]["$ref"].endswith(f"/{modelo.__name__}")
+
+
+def test_mis_turnos_respetan_el_esquema_y_paginan(cliente, datos):
+    dia = datos.hoy + timedelta(days=4)
+    for hora in ("09:00", "10:00", "11:00"):
+        assert cliente.post("/reserva", json=pedido_reserva(datos, dia, hora)).status_code == 200
+    respuesta = cliente.get("/empleados/mis-turnos", params={"limit": 2, "desde": dia.isoformat()},
+                            headers=datos.headers_empleado)
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == "application/json"
+    turnos = [ShowTurno.model_validate(turno) for turno in respuesta.json()]
+    assert [turno.hora_inicio.isoformat() for turno in turnos] == ["09:00:00", "10:00:00"]
+    assert respuesta.headers["x-siguiente-cursor"]
+
+
+def test_el_cursor_se_puede_leer_desde_otro_origen(cliente, datos):
+    headers = dict(datos.headers_empleado, Origin="https://turnos.ejemplo.com")
+    respuesta = cliente.get("/empleados/mis-turnos", params={"limit": 1}, headers=headers)
+    expuestos = {h.strip().lower() for h in respuesta.headers["access-control-expose-headers"].split(",")}
+    assert {"x-siguiente-cursor", "etag", "x-request-id"} <= expuestos
+
+
+def test_listado_de_empleados_no_expone_credenciales(cliente, datos):
+    respuesta = cliente.get("/superadmin/empleados", headers=datos.headers_super_admin)
+    assert respuesta.status_code == 200
+    for empleado in respuesta.json():
+        assert set(empleado) == set(EmpleadoListado.model_fields)
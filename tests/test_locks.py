@@ -0,0 +1,17 @@
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from app.db.locks import bloqueo_empleado_dia
+
+
+def test_el_lock_local_se_toma_con_la_conexion_ya_reservada():
+    # Si la conexión se pidiera después del lock, quien lo tiene podría esperar al pool
+    # mientras los que esperan el lock retienen todas las conexiones.
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=1, max_overflow=0)
+    with Session(engine) as db:
+        assert not db.in_transaction()
+        with bloqueo_empleado_dia(db, 1, date(2030, 1, 1)):
+            assert db.in_transaction()
+            assert engine.pool.checkedout() == 1
+    engine.dispose()
@@ -0,0 +1,38 @@
+import json
+import logging
+import queue
+from app.core.logs import FormateadorJSON, HandlerCola
+
+
+def evento_encolado(loguear) -> dict:
+    cola = queue.Queue()
+    logger = logging.getLogger("pruebas.logs")
+    logger.propagate = False
+    logger.handlers = [HandlerCola(cola)]
+    try:
+        loguear(logger)
+    finally:
+        logger.handlers = []
+    # Del otro lado de la cola, como el QueueListener
+    return json.loads(FormateadorJSON().format(cola.get_nowait()))
+
+
+def test_la_excepcion_llega_como_campo_estructurado():
+    def loguear(logger):
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("falló el cálculo de %s", "disponibilidad", extra={"empleado_id": 3})
+
+    evento = evento_encolado(loguear)
+    assert evento["mensaje"] == "falló el cálculo de disponibilidad"
+    assert evento["nivel"] == "ERROR"
+    assert evento["empleado_id"] == 3
+    assert "ZeroDivisionError" in evento["excepcion"]
+    assert "Traceback" in evento["excepcion"]
+
+
+def test_sin_excepcion_no_hay_campo():
+    evento = evento_encolado(lambda logger: logger.warning("aviso"))
+    assert evento["mensaje"] == "aviso"
+    assert "excepcion" not in evento
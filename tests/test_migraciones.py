@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+from app.db import migraciones
+from app.db.migraciones import MIGRACIONES, aplicar_migraciones, verificar_planes
+from app.db.session import Base
+from app import models  # noqa: F401  registra los modelos en Base.metadata
+
+
+def esquema(bind) -> dict:
+    inspector = inspect(bind)
+    return {
+        tabla: ({c["name"] for c in inspector.get_columns(tabla)},
+                {i["name"] for i in inspector.get_indexes(tabla)})
+        for tabla in inspector.get_table_names() if tabla != "migraciones"
+    }
+
+
+def esquema_de_los_modelos() -> dict:
+    return {
+        tabla.name: ({c.name for c in tabla.columns}, {i.name for i in tabla.indexes})
+        for tabla in Base.metadata.tables.values()
+    }
+
+
+# Lo que agrega cada migración: no debe existir antes (ninguna lee los modelos actuales)
+AGREGA = {
+    "0002_users_token_version": ("users", "token_version", None),
+    "0004_indices_consultas_frecuentes": ("agendas", None, "ix_agendas_empleado_dia"),
+    "0005_indice_turnos_paginados": ("turnos", None, "ix_turnos_dia_hora_id"),
+    "0006_tabla_slots": ("slots", None, None),
+    "0007_clientes_normalizados": ("clientes", "email_normalizado", "ux_clientes_email_normalizado"),
+}
+
+
+def contiene(actual: dict, tabla: str, columna, indice) -> bool:
+    if tabla not in actual:
+        return False
+    columnas, indices = actual[tabla]
+    return (columna is None or columna in columnas) and (indice is None or indice in indices)
+
+
+@pytest.mark.parametrize("detenida_en", range(1, len(MIGRACIONES) + 1),
+                         ids=[id_migracion for id_migracion, _ in MIGRACIONES])
+def test_una_base_detenida_en_cada_migracion_se_actualiza(tmp_path, monkeypatch, detenida_en):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migraciones.db'}")
+    with monkeypatch.context() as parche:
+        parche.setattr(migraciones, "MIGRACIONES", MIGRACIONES[:detenida_en])
+        aplicar_migraciones(engine)
+    intermedio = esquema(engine)
+    for posicion, (id_migracion, _) in enumerate(MIGRACIONES):
+        if id_migracion in AGREGA:
+            assert contiene(intermedio, *AGREGA[id_migracion]) == (posicion < detenida_en), id_migracion
+
+    pendientes = [id_migracion for id_migracion, _ in MIGRACIONES[detenida_en:]]
+    assert aplicar_migraciones(engine) == pendientes
+    assert esquema(engine) == esquema_de_los_modelos()
+    assert verificar_planes(engine) == []
+    engine.dispose()
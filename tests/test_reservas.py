@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import timedelta
+import pytest
+from tests.datos import pedido_reserva
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Bastante más que el pool (5 + 10 de overflow): así se nota si el lock se toma sin conexión
+RESERVAS_SIMULTANEAS = 200
+
+
+@pytest.mark.parametrize("db_async", ["0", "1"])
+def test_reservas_simultaneas_del_mismo_horario_tienen_un_solo_ganador(tmp_path, db_async):
+    # Proceso aparte: DB_ASYNC se lee al importar la app. El timeout convierte un
+    # bloqueo del worker en un fallo en vez de colgar la corrida.
+    entorno = dict(os.environ, DB_ASYNC=db_async)
+    proceso = subprocess.run(
+        [sys.executable, "-m", "tests.reserva_concurrente",
+         f"sqlite:///{tmp_path / 'concurrencia.db'}", str(RESERVAS_SIMULTANEAS)],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True, timeout=120,
+    )
+    assert proceso.returncode == 0, proceso.stderr
+    estados = json.loads(proceso.stdout.strip().splitlines()[-1])
+    assert estados == {"200": 1, "400": RESERVAS_SIMULTANEAS - 1}
+
+
+def test_reserva_de_un_horario_ocupado_se_rechaza(cliente, datos):
+    dia = datos.hoy + timedelta(days=2)
+    assert cliente.post("/reserva", json=pedido_reserva(datos, dia, "11:00")).status_code == 200
+    respuesta = cliente.post("/reserva", json=pedido_reserva(datos, dia, "11:15", cliente="Otro"))
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"] == "Este horario ya está ocupado"
+
+
+def test_la_reserva_usa_la_duracion_actual_del_servicio(cliente, datos):
+    from app.db.session import SessionLocal
+    from app.models import Servicio
+    from app.utils.referencias import obtener_servicio
+
+    dia = datos.hoy + timedelta(days=8)
+    db = SessionLocal()
+    servicio = Servicio(nombre="color", precio=1000, duracion=30, empleado_id=datos.empleado_ids[1],
+                        negocio_id=datos.negocio_id)
+    db.add(servicio)
+    db.commit()
+    pedido = dict(pedido_reserva(datos, dia, "09:00", empleado=1), servicio_id=servicio.id)
+    assert obtener_servicio(db, servicio.id).duracion == 30  # queda en la cache de este worker
+
+    # Otro worker lo edita y después lo borra: esta cache no se entera hasta el TTL
+    servicio.duracion = 60
+    db.commit()
+    respuesta = cliente.post("/reserva", json=pedido)
+    assert respuesta.status_code == 200
+    assert respuesta.json()["hora_fin"] == "10:00:00"
+
+    db.delete(servicio)
+    db.commit()
+    db.close()
+    respuesta = cliente.post("/reserva", json=dict(pedido, hora_inicio="11:00"))
+    assert respuesta.status_code == 404
@@ -0,0 +1,23 @@
+import inspect
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from app.core.rutas import a_async, en_threadpool
+from app.db.session import get_db
+
+
+def endpoint(empleado_id: int, db: Session = Depends(get_db)):
+    return empleado_id
+
+
+def test_los_endpoints_con_sesion_pasan_a_corrutinas():
+    convertido = a_async(endpoint)
+    assert inspect.iscoroutinefunction(convertido)
+    assert list(inspect.signature(convertido).parameters) == ["empleado_id", "db"]
+
+
+def test_en_threadpool_deja_el_endpoint_sync():
+    def calculo_pesado(empleado_id: int, db: Session = Depends(get_db)):
+        return empleado_id
+
+    marcado = en_threadpool(calculo_pesado)
+    assert a_async(marcado) is calculo_pesado
@@ -0,0 +1,15 @@
+def servicio(nombre="barba"):
+    return {"nombre": nombre, "precio": 800, "duracion": 20, "direccion": "Calle 123"}
+
+
+def test_admin_crea_servicio_para_su_empleado(cliente, datos):
+    empleado_id = datos.empleado_ids[1]
+    respuesta = cliente.post(f"/empleados/admin/{empleado_id}/servicios", json=servicio(), headers=datos.headers_admin)
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["empleado_id"] == empleado_id
+
+
+def test_admin_no_crea_servicio_para_quien_no_es_su_empleado(cliente, datos):
+    for usuario_id in (datos.admin_id, datos.super_admin_id, 999999):
+        respuesta = cliente.post(f"/empleados/admin/{usuario_id}/servicios", json=servicio(), headers=datos.headers_admin)
+        assert respuesta.status_code == 404
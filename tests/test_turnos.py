@@ -0,0 +1,40 @@
+from datetime import timedelta
+from tests.datos import pedido_reserva
+
+
+def turno(datos, dia, hora_inicio, hora_fin):
+    return dict(pedido_reserva(datos, dia, hora_inicio), hora_fin=hora_fin)
+
+
+def test_superadmin_no_crea_ni_mueve_turnos_sobre_un_horario_ocupado(cliente, datos):
+    dia = datos.hoy + timedelta(days=5)
+    headers = datos.headers_super_admin
+    primero = cliente.post("/superadmin/turnos", json=turno(datos, dia, "09:00", "09:30"), headers=headers)
+    assert primero.status_code == 200
+    solapado = cliente.post("/superadmin/turnos", json=turno(datos, dia, "09:15", "09:45"), headers=headers)
+    assert solapado.status_code == 400
+    assert solapado.json()["detail"] == "Este horario ya está ocupado"
+    segundo = cliente.post("/superadmin/turnos", json=turno(datos, dia, "09:30", "10:00"), headers=headers)
+    assert segundo.status_code == 200
+
+    mover = {"hora_inicio": "09:00:00", "hora_fin": "09:30:00"}
+    assert cliente.put(f"/superadmin/turnos/{segundo.json()['id']}", json=mover, headers=headers).status_code == 400
+    # Sin cambio de horario no hay nada que validar
+    estado = cliente.put(f"/superadmin/turnos/{segundo.json()['id']}", json={"estado": "pagado"}, headers=headers)
+    assert estado.status_code == 200
+    assert estado.json()["estado"] == "pagado"
+
+
+def test_empleado_no_mueve_un_turno_sobre_otro(cliente, datos):
+    dia = datos.hoy + timedelta(days=6)
+    assert cliente.post("/reserva", json=pedido_reserva(datos, dia, "10:00")).status_code == 200
+    propio = cliente.post("/reserva", json=pedido_reserva(datos, dia, "11:00"))
+    assert propio.status_code == 200
+    url = f"/empleados/turnos/{propio.json()['id']}"
+    headers = datos.headers_empleado
+
+    assert cliente.put(url, json={"hora_inicio": "10:15:00", "hora_fin": "10:45:00"}, headers=headers).status_code == 400
+    assert cliente.put(url, json={"hora_inicio": "11:30:00", "hora_fin": "11:00:00"}, headers=headers).status_code == 400
+    movido = cliente.put(url, json={"hora_inicio": "10:30:00", "hora_fin": "11:00:00"}, headers=headers)
+    assert movido.status_code == 200
+    assert movido.json()["hora_inicio"] == "10:30:00"